@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 18/10/2026 3:46 pm
+
+Counting of the crawled articles per site and per period
+"""
+# Third party imports
+import numpy as np
+import pandas as pd
+
+
+FREQUENCIES = {'D': 'daily', 'W': 'weekly', 'M': 'monthly'}
+
+
+def period_starts(date_start, date_end, freq='D'):
+    """
+    Start dates of the periods covering [date_start, date_end]
+    """
+    if freq == 'D':
+        return pd.date_range(date_start, date_end, freq='D')
+    if freq == 'W':
+        return pd.date_range(date_start, date_end, freq='7D')
+    if freq == 'M':
+        return pd.date_range(pd.Timestamp(date_start).to_period('M').to_timestamp(),
+                             date_end, freq='MS')
+    raise ValueError('Unknown frequency {}, expected one of {}'.format(freq, list(FREQUENCIES)))
+
+
+def count_matrix(dates_by_site, date_start, date_end, freq='D', weights_by_site=None):
+    """
+    Count the articles of each site per period in one pass over the dates
+    :param dates_by_site: dictionary of {site name: array-like of dates}
+    :param date_start, date_end: inclusive date range, e.g. '2020-01-01'
+    :param freq: 'D' (daily), 'W' (weekly, starting on date_start) or 'M' (monthly)
+    :param weights_by_site: dictionary of {site name: number of articles of
+                            each date}, None to count each date once
+    :return: (counts, periods) where counts is a sites x periods int matrix,
+             in the order of dates_by_site, and periods the period start dates
+    """
+    periods = period_starts(date_start, date_end, freq)
+    start = np.datetime64(pd.Timestamp(date_start).date(), 'D')
+    end = np.datetime64(pd.Timestamp(date_end).date(), 'D')
+
+    counts = np.zeros((len(dates_by_site), len(periods)), dtype=np.int64)
+    for k, (site_name, dates) in enumerate(dates_by_site.items()):
+        dates = np.asarray(dates, dtype='datetime64[D]')
+        in_range = (dates >= start) & (dates <= end)
+        dates = dates[in_range]
+        weights = None
+        if weights_by_site is not None:
+            weights = np.asarray(weights_by_site[site_name], dtype=np.int64)[in_range]
+
+        # Convert the dates to period offsets
+        if freq == 'M':
+            offsets = (dates.astype('datetime64[M]') - start.astype('datetime64[M]')).astype(np.int64)
+        else:
+            offsets = (dates - start).astype(np.int64)
+            if freq == 'W':
+                offsets //= 7
+        counts[k] = np.bincount(offsets, weights=weights, minlength=len(periods))
+    return counts, periods
+
+
+def rollup_matrix(counts_by_site, date_start, date_end, freq='D'):
+    """
+    Same as count_matrix, from the per-day counts of the rollups
+    :param counts_by_site: dictionary of {site name: {'YYYY-MM-DD': count}}
+    """
+    dates_by_site = {site_name: list(counts) for site_name, counts in counts_by_site.items()}
+    weights_by_site = {site_name: list(counts.values()) for site_name, counts in counts_by_site.items()}
+    return count_matrix(dates_by_site, date_start, date_end, freq, weights_by_site)
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 18/10/2026 4:02 pm
+
+Benchmark and fixture checks of the published date extraction of every site
+"""
+# Standard library imports
+import sys
+import json
+import timeit
+import argparse
+from datetime import datetime, timedelta
+
+# Third party imports
+from lxml import html
+
+# Local application imports
+from crawl_news import CRAWLERs
+from dates import DateExtractor, parse_date, ld_json_date
+from extraction import LD_JSON_XPATH
+
+
+EXPECTED_FILE = 'fixtures/expected.json'
+
+# (raw date, format, expected naive Vietnam datetime)
+TIMEZONE_CASES = [('2020-03-10T09:15:00+07:00', 'iso', '2020-03-10 09:15:00'),
+                  ('2020-03-10T02:15:00Z', 'iso', '2020-03-10 09:15:00'),
+                  ('2020-03-10T02:15:00+00:00', 'iso', '2020-03-10 09:15:00'),
+                  ('2020-03-09T21:15:00-05:00', 'iso', '2020-03-10 09:15:00'),
+                  ('2020-03-10T09:15:00', 'iso', '2020-03-10 09:15:00'),
+                  ('2020-03-10T09:15:00.12', 'iso_padded', '2020-03-10 09:15:00.120000'),
+                  ('2020-03-10T09:15:00.1234567+07:00', 'iso_padded', '2020-03-10 09:15:00.123456'),
+                  ('2020-03-10T09:15', 'iso_padded', '2020-03-10 09:15:00'),
+                  ('2020-03-10T09:15:00+0700', '%Y-%m-%dT%H:%M:%S%z', '2020-03-10 09:15:00'),
+                  ('2020-03-10T02:15:00+0000', '%Y-%m-%dT%H:%M:%S%z', '2020-03-10 09:15:00'),
+                  ('10/03/2020 | 09:15', '%d/%m/%Y | %H:%M', '2020-03-10 09:15:00')]
+
+# ld+json page whose nested objects (video, review, isPartOf) declare a
+# datePublished before the one of the article
+LD_JSON_NESTED_FILE = 'fixtures/html/ld_json_nested.html'
+LD_JSON_NESTED_DATE = '2020-03-10 09:15:00'
+
+
+def parse_date_baseline(value, fmt):
+    # Former parsing, dropping the time zones
+    value = value.strip()
+    if fmt == 'iso':
+        art_date = datetime.fromisoformat(value)
+    elif fmt == 'iso_padded':
+        if '.' not in value:
+            value = value + '.'
+        art_date = datetime.fromisoformat(value.ljust(23, '0'))
+    else:
+        art_date = datetime.strptime(value, fmt)
+    return art_date.replace(tzinfo=None)
+
+
+def ld_json_date_baseline(scripts):
+    # Former lookup, decoding every block
+    for script in scripts:
+        try:
+            script = json.loads(script)
+        except ValueError:
+            continue
+        if isinstance(script, dict) and 'datePublished' in script:
+            return script['datePublished']
+    return None
+
+
+def check_fixtures(expected_all):
+    """
+    Check the date of every article fixture, from the parsed page and the raw bytes
+    :return: list of error messages
+    """
+    errors = []
+    for site_name, spidercls in CRAWLERs.items():
+        expected = expected_all[site_name]
+        with open('fixtures/html/' + expected['file'], 'rb') as f:
+            body = f.read()
+        extractor = spidercls.site
+        root = html.fromstring(body)
+        head_values = extractor.scan_head(root)
+        ld_json_scripts = LD_JSON_XPATH(root) if extractor.use_ld_json else []
+        from_tree = extractor.date.from_tree(root, head_values, ld_json_scripts)
+        from_bytes = extractor.date.from_bytes(body[:extractor.sniff_bytes])
+        if str(from_tree) != expected['published_datetime']:
+            errors.append('{}: date {} from the page, expected {}'.format(
+                site_name, from_tree, expected['published_datetime']))
+        # The sniffing does not read the dates given by an XPath
+        if extractor.date.xpath is None and from_bytes != from_tree:
+            errors.append('{}: date {} from the bytes, {} from the page'.format(
+                site_name, from_bytes, from_tree))
+        print(f'  {site_name:<11s} {extractor.date.source:<34s} {from_tree}  '
+              f'{"sniffed" if from_bytes is not None else "not sniffed"}')
+    return errors
+
+
+def check_ld_json_nested():
+    errors = []
+    with open(LD_JSON_NESTED_FILE, 'rb') as f:
+        body = f.read()
+    extractor = DateExtractor('ld+json', 'iso')
+    root = html.fromstring(body)
+    from_tree = extractor.from_tree(root, {}, LD_JSON_XPATH(root))
+    from_bytes = extractor.from_bytes(body)
+    for source, art_date in [('page', from_tree), ('bytes', from_bytes)]:
+        if str(art_date) != LD_JSON_NESTED_DATE:
+            errors.append('nested ld+json: date {} from the {}, expected {}'.format(
+                art_date, source, LD_JSON_NESTED_DATE))
+    return errors
+
+
+def check_timezones():
+    errors = []
+    for raw, fmt, expected in TIMEZONE_CASES:
+        art_date = str(parse_date(raw, fmt))
+        if art_date != expected:
+            errors.append('{!r} ({}) parsed as {}, expected {}'.format(raw, fmt, art_date, expected))
+    return errors
+
+
+# ------------------------------------------------------------------------------
+# Main function
+# ------------------------------------------------------------------------------
+if __name__ == '__main__':
+    args = argparse.ArgumentParser(description='Published date extraction benchmark')
+    args.add_argument('--n_dates', default=10000, type=int,
+                      help='Number of distinct dates parsed per format')
+    args.add_argument('--repeat', default=5, type=int,
+                      help='Number of timing repeats')
+    cmd_args = args.parse_args()
+
+    with open(EXPECTED_FILE, encoding='utf-8') as f:
+        expected_all = json.load(f)
+    print('Fixtures')
+    errors = check_fixtures(expected_all) + check_ld_json_nested() + check_timezones()
+
+    # Time the parsing of distinct dates, then of dates parsed again
+    dates = [datetime(2020, 1, 1) + timedelta(minutes=17 * k) for k in range(cmd_args.n_dates)]
+    samples = {'iso': [d.strftime('%Y-%m-%dT%H:%M:%S+07:00') for d in dates],
+               'iso_padded': [d.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-4] for d in dates],
+               '%d/%m/%Y | %H:%M': [d.strftime('%d/%m/%Y | %H:%M') for d in dates],
+               '%Y-%m-%dT%H:%M:%S%z': [d.strftime('%Y-%m-%dT%H:%M:%S+0700') for d in dates]}
+    print(f'\nParsing of {cmd_args.n_dates} dates (us/date), memoised when parsed again')
+    print(f'  {"format":<22s} {"baseline":>9s} {"parser":>9s} {"memoised":>9s}')
+    for fmt, values in samples.items():
+        again = values[:parse_date.cache_info().maxsize]
+        runs = {'baseline': (lambda: [parse_date_baseline(v, fmt) for v in values], values),
+                'parser': (lambda: [parse_date.__wrapped__(v, fmt) for v in values], values),
+                'memoised': (lambda: [parse_date(v, fmt) for v in again], again)}
+        parse_date.cache_clear()
+        times = {name: min(timeit.repeat(run, number=1, repeat=cmd_args.repeat)) / len(run_values) * 1e6
+                 for name, (run, run_values) in runs.items()}
+        print(f'  {fmt:<22s} {times["baseline"]:9.2f} {times["parser"]:9.2f} {times["memoised"]:9.2f}')
+
+    # Time the ld+json lookup on the fixtures
+    print('\nld+json datePublished lookup (us/page)')
+    for site_name, spidercls in CRAWLERs.items():
+        if not spidercls.site.date.uses_ld_json:
+            continue
+        with open('fixtures/html/' + expected_all[site_name]['file'], 'rb') as f:
+            scripts = LD_JSON_XPATH(html.fromstring(f.read()))
+        baseline = min(timeit.repeat(lambda: ld_json_date_baseline(scripts), number=1000,
+                                     repeat=cmd_args.repeat)) * 1e3
+        new = min(timeit.repeat(lambda: ld_json_date(scripts), number=1000,
+                                repeat=cmd_args.repeat)) * 1e3
+        print(f'  {site_name:<11s} baseline {baseline:6.2f}  new {new:6.2f}  '
+              f'({len(scripts)} blocks)')
+
+    if errors:
+        print('\n'.join(['FAILED:'] + errors))
+        sys.exit(1)
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 18/10/2026 10:40 am
+
+Micro-benchmark of the keyword matching on the crawled titles
+"""
+# Standard library imports
+import json
+import timeit
+import argparse
+
+# Local application imports
+from keyword_matcher import KeywordMatcher, fold_diacritics
+from crawl_news import KEYWORDS
+
+
+def exist_keywords_baseline(content, keywords):
+    return any(kw in content.lower() for kw in keywords)
+
+
+# ------------------------------------------------------------------------------
+# Main function
+# ------------------------------------------------------------------------------
+if __name__ == '__main__':
+    args = argparse.ArgumentParser(description='Keyword matching benchmark')
+    args.add_argument('--data_file', default='data/zingnews.jsonl', type=str,
+                      help='Crawled jsonlines file providing the titles')
+    args.add_argument('--n_extra_terms', default=500, type=int,
+                      help='Number of synthetic terms added for the scaling run')
+    args.add_argument('--repeat', default=5, type=int,
+                      help='Number of timing repeats')
+    cmd_args = args.parse_args()
+
+    with open(cmd_args.data_file) as f:
+        titles = [json.loads(line)['title'] for line in f]
+    print(f'{len(titles)} titles from {cmd_args.data_file}')
+
+    # Grow the list with synthetic terms that never hit to show the scaling
+    extra_terms = [f'tu khoa {k} khong co' for k in range(cmd_args.n_extra_terms)]
+    for name, keywords in [('KEYWORDS', KEYWORDS),
+                           (f'KEYWORDS + {len(extra_terms)} terms', KEYWORDS + extra_terms)]:
+        matcher = KeywordMatcher(keywords)
+        runs = {'baseline': lambda: [exist_keywords_baseline(t, keywords) for t in titles],
+                'matcher.search': lambda: [matcher.search(t) for t in titles],
+                'matcher.find_terms': lambda: [matcher.find_terms(t) for t in titles]}
+        print(f'\n{name}')
+        for run_name, run in runs.items():
+            best = min(timeit.repeat(run, number=1, repeat=cmd_args.repeat))
+            print(f'  {run_name:<20s} {best * 1e3:8.2f} ms  '
+                  f'({best / len(titles) * 1e6:.2f} us/title)')
+
+        n_baseline = sum(exist_keywords_baseline(t, keywords) for t in titles)
+        n_matcher = sum(matcher.search(t) for t in titles)
+        print(f'  hits: baseline {n_baseline}, matcher {n_matcher}')
+
+    # Titles only matched thanks to the diacritic folding
+    matcher = KeywordMatcher(KEYWORDS)
+    folded_only = [t for t in titles if not exist_keywords_baseline(t, KEYWORDS)
+                   and matcher.search(t)]
+    print(f'\n{len(folded_only)} titles only matched after folding, e.g.')
+    for t in folded_only[:5]:
+        print('  ', t, '->', fold_diacritics(t))
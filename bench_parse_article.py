@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 18/10/2026 3:50 pm
+
+Throughput benchmark of parse_article over the HTML fixtures of every site.
+
+The fixtures in fixtures/html are synthetic pages, not saved copies of the
+sites: they reproduce the head metas, ld+json blocks, article markers and
+page sizes of each site spec, with generated Vietnamese text and links.
+They check the extraction logic and time it on realistic page sizes, but
+do not replace a check against the live layouts of the sites.
+
+The baseline stores the cost of the article and listing pages relative to
+the time lxml takes to build the DOM of the article page, measured in the
+same run, so the regression check does not depend on the speed of the
+machine.
+"""
+# Standard library imports
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+from statistics import median
+from contextlib import redirect_stdout
+
+# Third party imports
+from scrapy.http import HtmlResponse, Request
+from scrapy.utils.test import get_crawler
+
+# Local application imports
+from crawl_news import CRAWLERs, START_DATE, END_DATE
+from extraction import LD_JSON_XPATH
+
+
+FIXTURE_DIR = 'fixtures/html'
+EXPECTED_FILE = 'fixtures/expected.json'
+BASELINE_FILE = 'fixtures/bench_baseline.json'
+
+
+def load_fixture(file_name):
+    with open(os.path.join(FIXTURE_DIR, file_name), 'rb') as f:
+        return f.read()
+
+
+def time_per_call(func, n_iters):
+    """
+    Best of 3 average time per call, in microseconds
+    """
+    best = float('inf')
+    for _ in range(3):
+        tic = time.perf_counter()
+        for _ in range(n_iters):
+            func()
+        best = min(best, (time.perf_counter() - tic) / n_iters)
+    return best * 1e6
+
+
+def interleaved_times(funcs, iter_counts, repeat=7):
+    """
+    Average time per call of each function, in microseconds, the functions
+    being timed in turn in each round so they see the same machine load
+    :param iter_counts: number of calls per timing of each function
+    :return: list of the times of the functions, one list per round
+    """
+    rounds = []
+    for _ in range(repeat):
+        times = []
+        for func, n_iters in zip(funcs, iter_counts):
+            tic = time.perf_counter()
+            for _ in range(n_iters):
+                func()
+            times.append((time.perf_counter() - tic) / n_iters * 1e6)
+        rounds.append(times)
+    return rounds
+
+
+def check_output(site_name, items, expected):
+    """
+    Check the item extracted from the article fixture
+    :return: list of error messages
+    """
+    if len(items) != 1:
+        return ['{}: expected 1 item, got {}'.format(site_name, len(items))]
+    errors = []
+    for field in ['published_datetime', 'title', 'keywords', 'description']:
+        value = str(items[0][field]).strip()
+        if value != expected[field]:
+            errors.append('{}: {} is {!r}, expected {!r}'.format(site_name, field, value, expected[field]))
+    return errors
+
+
+def bench_site(site_name, expected, n_iters):
+    spidercls = CRAWLERs[site_name]
+    spider = spidercls.from_crawler(get_crawler(spidercls), data_dir='/nonexistent')
+    extractor = spider.site
+    article_body = load_fixture(expected['file'])
+    listing_body = load_fixture(expected['listing_file'])
+
+    def parse(url, body):
+        # A new response each time, the parsed tree is cached on the response
+        response = HtmlResponse(url, body=body, encoding='utf-8', request=Request(url))
+        with redirect_stdout(io.StringIO()):
+            return list(spider.parse_article(response))
+
+    errors = check_output(site_name, parse(expected['url'], article_body), expected)
+    if parse(expected['listing_url'], listing_body):
+        errors.append('{}: the listing page gave an item'.format(site_name))
+    if extractor.sniff(article_body, START_DATE, END_DATE)[0] is not None:
+        errors.append('{}: the article page is rejected by the sniffing'.format(site_name))
+
+    # Time the whole callback on the article and the listing pages, and the
+    # DOM build of the article page used as the unit of the baseline
+    rounds = interleaved_times(
+        [lambda: parse(expected['url'], article_body),
+         lambda: parse(expected['listing_url'], listing_body),
+         lambda: HtmlResponse(expected['url'], body=article_body, encoding='utf-8').selector],
+        # The listing pages are parsed about 20 times faster
+        [n_iters, 20 * n_iters, n_iters])
+    article_us, listing_us, dom_us = [min(times) for times in zip(*rounds)]
+    result = {'article_us': article_us, 'listing_us': listing_us}
+    result['article_pages_per_sec'] = 1e6 / result['article_us']
+    result['listing_pages_per_sec'] = 1e6 / result['listing_us']
+
+    # Time each extraction stage on the parsed tree
+    response = HtmlResponse(expected['url'], body=article_body, encoding='utf-8')
+    root = response.selector.root
+    ld_json_scripts = LD_JSON_XPATH(root) if extractor.use_ld_json else []
+    head_values = extractor.scan_head(root)
+    result['fields_us'] = {
+        'sniff': time_per_call(lambda: extractor.sniff(listing_body, START_DATE, END_DATE), n_iters),
+        'dom': dom_us,
+        'article_check': time_per_call(lambda: extractor.is_article(root, expected['url']), n_iters),
+        'ld_json': time_per_call(lambda: LD_JSON_XPATH(root), n_iters) if extractor.use_ld_json else 0.,
+        'head': time_per_call(lambda: extractor.scan_head(root), n_iters),
+        'date': time_per_call(lambda: extractor.date.from_tree(root, head_values, ld_json_scripts), n_iters)}
+
+    # Cost of the pages in DOM builds, comparable across machines, the
+    # median over the rounds being robust to the load changes between rounds
+    result['article_dom_ratio'] = float(median(article / dom for article, _, dom in rounds))
+    result['listing_dom_ratio'] = float(median(listing / dom for _, listing, dom in rounds))
+
+    # Measure the allocations of one article page
+    tracemalloc.start()
+    parse(expected['url'], article_body)
+    _, result['article_peak_kb'] = tracemalloc.get_traced_memory()
+    result['article_peak_kb'] /= 1024
+    tracemalloc.stop()
+    return result, errors
+
+
+# ------------------------------------------------------------------------------
+# Main function
+# ------------------------------------------------------------------------------
+if __name__ == '__main__':
+    args = argparse.ArgumentParser(description='parse_article benchmark')
+    args.add_argument('--sites', default='all', type=str,
+                      help='Comma-separated names of the online newspapers, or "all"')
+    args.add_argument('--n_iters', default=50, type=int,
+                      help='Number of pages parsed per timing')
+    args.add_argument('--tolerance', default=0.3, type=float,
+                      help='Allowed throughput drop relative to the baseline, '
+                           'both normalised to the DOM build time')
+    args.add_argument('--update_baseline', action='store_true',
+                      help='Store the results as the new baseline')
+    cmd_args = args.parse_args()
+
+    with open(EXPECTED_FILE, encoding='utf-8') as f:
+        expected_all = json.load(f)
+    site_names = list(CRAWLERs) if cmd_args.sites == 'all' else cmd_args.sites.split(',')
+    baseline = {}
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE) as f:
+            baseline = json.load(f)
+
+    results, errors = {}, []
+    print(f'{"site":<11s} {"article/s":>10s} {"listing/s":>10s} {"art/dom":>8s} {"list/dom":>8s} '
+          f'{"sniff":>8s} {"dom":>8s} {"article":>8s} {"ld+json":>8s} {"head":>8s} {"date":>8s} '
+          f'{"peak KB":>8s}')
+    for site_name in site_names:
+        result, site_errors = bench_site(site_name, expected_all[site_name], cmd_args.n_iters)
+        results[site_name] = result
+        errors += site_errors
+        fields = result['fields_us']
+        print(f'{site_name:<11s} {result["article_pages_per_sec"]:10.0f} '
+              f'{result["listing_pages_per_sec"]:10.0f} {result["article_dom_ratio"]:8.2f} '
+              f'{result["listing_dom_ratio"]:8.3f} {fields["sniff"]:8.1f} {fields["dom"]:8.1f} '
+              f'{fields["article_check"]:8.1f} {fields["ld_json"]:8.1f} {fields["head"]:8.1f} '
+              f'{fields["date"]:8.1f} {result["article_peak_kb"]:8.0f}')
+
+        # Compare the normalised throughput with the baseline
+        for key in ['article_dom_ratio', 'listing_dom_ratio']:
+            if key in baseline.get(site_name, {}) and \
+                    result[key] * (1 - cmd_args.tolerance) > baseline[site_name][key]:
+                errors.append('{}: {} rose from {:.3f} to {:.3f} DOM builds per page'.format(
+                    site_name, key, baseline[site_name][key], result[key]))
+    print('(stage times in microseconds per page)')
+
+    if cmd_args.update_baseline:
+        baseline.update({site_name: {key: results[site_name][key]
+                                     for key in ['article_dom_ratio', 'listing_dom_ratio']}
+                         for site_name in site_names})
+        with open(BASELINE_FILE, 'w') as f:
+            json.dump(baseline, f, indent=2)
+        print(f'Baseline written to {BASELINE_FILE}')
+    if errors:
+        print('\n'.join(['FAILED:'] + errors))
+        sys.exit(1)
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 18/10/2026 4:04 pm
+
+Store of all the in-window articles, and offline re-filtering of the stored
+articles with a new keyword set, without crawling again
+"""
+# Standard library imports
+import os
+import glob
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+# Third party imports
+import pyarrow.parquet as pq
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+
+# Local application imports
+from columnar_store import ParquetWriter
+from keyword_matcher import KeywordMatcher
+from seen_store import FingerprintSet, url_fingerprint
+from urls import canonicalize_url
+
+
+class CandidateWriter(ParquetWriter):
+    """
+    Parquet writer of the in-window articles of a site, with their canonical
+    url, skipping the urls already written by the run
+    """
+
+    def __init__(self, root, site_name, rows_per_part=5000):
+        super().__init__(root, site_name, rows_per_part)
+        self.urls = FingerprintSet()
+
+    def write(self, item):
+        url = canonicalize_url(item['url'])
+        if self.urls.add(url_fingerprint(url)):
+            super().write(dict(item, url=url))
+
+
+class CandidateStore:
+    """
+    Extension attaching a CandidateWriter to the spider as
+    spider.candidate_store, writing every in-window article, whether it has
+    the keywords or not, to the columnar store in the CANDIDATE_DIR setting
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.writer = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        root = crawler.settings.get('CANDIDATE_DIR')
+        if not root:
+            raise NotConfigured
+        ext = cls(root)
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        return ext
+
+    def spider_opened(self, spider):
+        self.writer = CandidateWriter(self.root, spider.name)
+        spider.candidate_store = self.writer
+
+    def spider_closed(self, spider):
+        self.writer.close()
+
+
+def filter_part(file_name, keywords):
+    """
+    Select the articles of a Parquet part having one of the keywords in their
+    title, keywords or description
+    :return: list of the matching articles, as dictionaries
+    """
+    matcher = KeywordMatcher(keywords)
+    table = pq.read_table(file_name)
+    texts = zip(table['title'].to_pylist(), table['keywords'].to_pylist(),
+                table['description'].to_pylist())
+    mask = [matcher.search((title or '') + (kw or '') + (description or ''))
+            for title, kw, description in texts]
+    return table.filter(mask).to_pylist()
+
+
+def refilter(candidate_dir, keywords, out_dir, sites=None, n_procs=None):
+    """
+    Apply a keyword set to the stored in-window articles, the Parquet parts
+    being filtered in parallel, and write the matching articles of each site
+    to <out_dir>/<site>.jsonl in the format of the crawler output. An article
+    stored by several runs or shards is written once.
+    :return: dictionary of {site name: (number of candidates, number of matches)}
+    """
+    if sites is None:
+        sites = sorted(os.path.basename(d)[5:] for d in glob.glob(os.path.join(candidate_dir, 'site=*')))
+    os.makedirs(out_dir, exist_ok=True)
+    counts = {}
+    with ProcessPoolExecutor(n_procs) as pool:
+        for site_name in sites:
+            file_names = sorted(glob.glob(os.path.join(candidate_dir, 'site={}'.format(site_name),
+                                                       'month=*', '*.parquet')))
+            n_candidates = sum(pq.ParquetFile(f).metadata.num_rows for f in file_names)
+            matches = [art for part in pool.map(filter_part, file_names, [keywords] * len(file_names))
+                       for art in part]
+            matches.sort(key=lambda art: art['published_datetime'])
+            articles = []
+            urls = set()
+            for art in matches:
+                art['url'] = canonicalize_url(art['url'])
+                if art['url'] not in urls:
+                    urls.add(art['url'])
+                    articles.append(art)
+            with open(os.path.join(out_dir, '{}.jsonl'.format(site_name)), 'w', encoding='utf-8') as f:
+                for art in articles:
+                    f.write(json.dumps({'date': art['date'].strftime('%Y-%m-%d'),
+                                        'url': art['url'],
+                                        'title': art['title'],
+                                        'keywords': art['keywords'],
+                                        'description': art['description'],
+                                        'published_datetime':
+                                            art['published_datetime'].isoformat()},
+                                       ensure_ascii=False) + '\n')
+            counts[site_name] = (n_candidates, len(articles))
+    return counts
+
+
+# ------------------------------------------------------------------------------
+# Main function
+# ------------------------------------------------------------------------------
+if __name__ == '__main__':
+    args = argparse.ArgumentParser(description='Re-filter the stored in-window articles')
+    args.add_argument('--candidate_dir', default='data/candidates/', type=str,
+                      help='Root directory of the stored in-window articles')
+    args.add_argument('--keywords', required=True, type=str,
+                      help='Comma-separated keywords, or a file with one keyword per line')
+    args.add_argument('--out_dir', default='data/refiltered/', type=str,
+                      help='Directory of the jsonlines files of the matching articles')
+    args.add_argument('--sites', default=None, type=str,
+                      help='Comma-separated names of the online newspapers, all by default')
+    args.add_argument('--n_procs', default=None, type=int,
+                      help='Number of processes, the number of cores by default')
+    cmd_args = args.parse_args()
+
+    if os.path.isfile(cmd_args.keywords):
+        with open(cmd_args.keywords, encoding='utf-8') as f:
+            keywords = [line.strip() for line in f if line.strip()]
+    else:
+        keywords = [kw.strip() for kw in cmd_args.keywords.split(',') if kw.strip()]
+    if not keywords:
+        args.error('no keyword given in --keywords')
+    sites = cmd_args.sites.split(',') if cmd_args.sites else None
+    counts = refilter(cmd_args.candidate_dir, keywords, cmd_args.out_dir, sites, cmd_args.n_procs)
+    for site_name, (n_candidates, n_matches) in counts.items():
+        print(f'{site_name:<11s} {n_matches:8d} / {n_candidates:8d} articles match')
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 18/10/2026 3:45 pm
+
+Columnar store of the crawled articles: Parquet files partitioned by site and month,
+<root>/site=<site>/month=<YYYY-MM>/part-*.parquet
+"""
+# Standard library imports
+import os
+import json
+import glob
+import shutil
+import argparse
+from datetime import datetime
+
+# Third party imports
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# Local application imports
+from urls import canonicalize_url
+
+
+SCHEMA = pa.schema([('date', pa.date32()),
+                    ('published_datetime', pa.timestamp('s')),
+                    ('url', pa.string()),
+                    ('title', pa.string()),
+                    ('keywords', pa.string()),
+                    ('description', pa.string())])
+PARTITIONING = ds.partitioning(pa.schema([('site', pa.string()), ('month', pa.string())]),
+                               flavor='hive')
+
+
+def to_row(item):
+    """
+    Typed row of an item, from the crawler or from a jsonlines file
+    """
+    art_date = item['published_datetime']
+    if isinstance(art_date, str):
+        art_date = datetime.fromisoformat(art_date)
+    return {'date': datetime.strptime(item['date'], '%Y-%m-%d').date(),
+            'published_datetime': art_date.replace(tzinfo=None),
+            'url': item['url'],
+            'title': item.get('title', ''),
+            'keywords': item.get('keywords', ''),
+            'description': item.get('description', '')}
+
+
+class ParquetWriter:
+    """
+    Buffer the rows of a site per month and write them as compressed Parquet
+    parts once a month holds rows_per_part rows, and on close
+    """
+
+    def __init__(self, root, site_name, rows_per_part=5000, compression='zstd'):
+        self.root = root
+        self.site_name = site_name
+        self.rows_per_part = rows_per_part
+        self.compression = compression
+        self.buffers = {}
+        self.n_parts = 0
+        # The workers of a sharded crawl write their parts at the same time
+        self.run_id = '{}-{}'.format(datetime.now().strftime('%Y%m%d%H%M%S'), os.getpid())
+
+    def write(self, item):
+        row = to_row(item)
+        month = row['date'].strftime('%Y-%m')
+        rows = self.buffers.setdefault(month, [])
+        rows.append(row)
+        if len(rows) >= self.rows_per_part:
+            self.flush(month)
+
+    def flush(self, month):
+        rows = self.buffers.pop(month, None)
+        if not rows:
+            return
+        part_dir = os.path.join(self.root, 'site={}'.format(self.site_name),
+                                'month={}'.format(month))
+        os.makedirs(part_dir, exist_ok=True)
+        file_name = os.path.join(part_dir, 'part-{}-{:05d}.parquet'.format(self.run_id, self.n_parts))
+        pq.write_table(pa.Table.from_pylist(rows, schema=SCHEMA), file_name,
+                       compression=self.compression)
+        self.n_parts += 1
+
+    def close(self):
+        for month in list(self.buffers):
+            self.flush(month)
+
+
+class ParquetExportPipeline:
+    """
+    Write the items to the columnar store in the PARQUET_DIR setting,
+    alongside the jsonlines feed
+    """
+
+    def __init__(self, crawler, root):
+        self.crawler = crawler
+        self.root = root
+        self.writer = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler, crawler.settings.get('PARQUET_DIR'))
+
+    def open_spider(self):
+        self.writer = ParquetWriter(self.root, self.crawler.spider.name)
+
+    def close_spider(self):
+        self.writer.close()
+
+    def process_item(self, item):
+        self.writer.write(item)
+        return item
+
+
+def convert_jsonl(file_name, root, site_name):
+    """
+    Convert a crawled jsonlines file to the columnar store, replacing the
+    partitions of the site and dropping the duplicate urls
+    :return: number of converted articles
+    """
+    shutil.rmtree(os.path.join(root, 'site={}'.format(site_name)), ignore_errors=True)
+    writer = ParquetWriter(root, site_name, rows_per_part=100000)
+    urls = set()
+    with open(file_name, encoding='utf-8') as f:
+        for line in f:
+            item = json.loads(line)
+            item['url'] = canonicalize_url(item['url'])
+            if item['url'] not in urls:
+                urls.add(item['url'])
+                writer.write(item)
+    writer.close()
+    return len(urls)
+
+
+def part_files(root, site_name):
+    """
+    Parquet parts of a site in the columnar store, sorted
+    """
+    return sorted(glob.glob(os.path.join(root, 'site={}'.format(site_name), 'month=*', '*.parquet')))
+
+
+def has_site(root, site_name):
+    return bool(part_files(root, site_name))
+
+
+def read_columns(root, columns=('date', 'url'), sites=None, start_month=None, end_month=None,
+                 files=None):
+    """
+    Read some columns of the columnar store, only opening the partitions of
+    the selected sites and months
+    :param sites: list of site names, None for all
+    :param start_month, end_month: inclusive bounds as 'YYYY-MM', None for no bound
+    :param files: list of the parts to read, None for all the parts of the store
+    :return: pyarrow Table with the columns and the 'site' partition column
+    """
+    dataset = ds.dataset(files if files is not None else root, format='parquet',
+                         partitioning=PARTITIONING, partition_base_dir=root)
+    condition = None
+    for cond in [ds.field('site').isin(sites) if sites is not None else None,
+                 ds.field('month') >= start_month if start_month is not None else None,
+                 ds.field('month') <= end_month if end_month is not None else None]:
+        if cond is not None:
+            condition = cond if condition is None else condition & cond
+    return dataset.to_table(columns=list(columns) + ['site'], filter=condition)
+
+
+# ------------------------------------------------------------------------------
+# Main function
+# ------------------------------------------------------------------------------
+if __name__ == '__main__':
+    args = argparse.ArgumentParser(description='Convert the crawled jsonlines files to Parquet')
+    args.add_argument('--data_dir', default='data/', type=str,
+                      help='Directory of the crawled jsonlines files')
+    args.add_argument('--parquet_dir', default='data/parquet/', type=str,
+                      help='Root directory of the columnar store')
+    args.add_argument('--sites', default='all', type=str,
+                      help='Comma-separated names of the online newspapers, or "all"')
+    cmd_args = args.parse_args()
+
+    if cmd_args.sites == 'all':
+        file_names = sorted(glob.glob(os.path.join(cmd_args.data_dir, '*.jsonl')))
+    else:
+        file_names = [os.path.join(cmd_args.data_dir, '{}.jsonl'.format(site_name))
+                      for site_name in cmd_args.sites.split(',')]
+    for file_name in file_names:
+        site_name = os.path.splitext(os.path.basename(file_name))[0]
+        n_articles = convert_jsonl(file_name, cmd_args.parquet_dir, site_name)
+        print(f'{site_name}: {n_articles} articles converted')
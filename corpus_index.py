@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 18/10/2026 4:06 pm
+
+On-disk inverted index of the crawled articles, with term, phrase and date
+range queries
+"""
+# Standard library imports
+import os
+import re
+import sqlite3
+import argparse
+from collections import Counter
+
+# Third party imports
+import numpy as np
+
+# Local application imports
+from keyword_matcher import tokenize
+from jsonl_reader import update_from_jsonl
+
+
+FIELDS = ('title', 'keywords', 'description')
+# A double-quoted phrase, possibly unclosed, or a word
+CLAUSE = re.compile(r'"([^"]*)(?:"|$)|([^\s"]+)')
+# Most doc ids passed to SQLite as parameters
+MAX_DOC_PARAMS = 900
+
+
+def token_positions(fields):
+    """
+    Positions of each token in the fields of an article, a position being
+    skipped between the fields so a phrase never spans two of them
+    :return: dictionary of {token: list of positions}
+    """
+    positions = {}
+    pos = 0
+    for text in fields:
+        for token in tokenize(text):
+            positions.setdefault(token, []).append(pos)
+            pos += 1
+        pos += 1
+    return positions
+
+
+def parse_query(query):
+    """
+    Split a query into its clauses, all required: the words, and the phrases
+    between double quotes, e.g. 'covid "gian cach xa hoi"'. An unclosed quote
+    runs to the end of the query.
+    :return: list of token lists, one per clause
+    """
+    clauses = [tokenize(phrase) if phrase is not None else tokenize(word)
+               for phrase, word in (match.group(1, 2) for match in CLAUSE.finditer(query))]
+    return [tokens for tokens in clauses if tokens]
+
+
+class InvertedIndex:
+    """
+    SQLite inverted index of the diacritic-folded tokens of the title, news
+    keywords and description of the crawled articles.
+
+    The postings table is clustered on (term, date, doc), so the postings of
+    a term are stored sorted by date and a date range query reads only the
+    postings of the range. Each posting keeps the positions of the term in
+    the article, to check the phrases. Like the story index, the read offset
+    of each jsonlines file is kept, so the index is updated from the lines
+    written since the last update only.
+    """
+
+    def __init__(self, file_name):
+        if os.path.dirname(file_name):
+            os.makedirs(os.path.dirname(file_name), exist_ok=True)
+        self.conn = sqlite3.connect(file_name)
+        self.conn.executescript(
+            'CREATE TABLE IF NOT EXISTS docs (id INTEGER PRIMARY KEY, url TEXT UNIQUE, '
+            'site TEXT, date TEXT);'
+            'CREATE TABLE IF NOT EXISTS terms (id INTEGER PRIMARY KEY, term TEXT UNIQUE);'
+            'CREATE TABLE IF NOT EXISTS postings (term INTEGER, date TEXT, doc INTEGER, '
+            'positions BLOB, PRIMARY KEY (term, date, doc)) WITHOUT ROWID;')
+        self.term_ids = dict(self.conn.execute('SELECT term, id FROM terms'))
+
+    def __len__(self):
+        return self.conn.execute('SELECT COUNT(*) FROM docs').fetchone()[0]
+
+    def term_id(self, term):
+        if term not in self.term_ids:
+            cursor = self.conn.execute('INSERT INTO terms (term) VALUES (?)', (term,))
+            self.term_ids[term] = cursor.lastrowid
+        return self.term_ids[term]
+
+    def add(self, url, site_name, art_date, fields):
+        """
+        Add an article if its url is new
+        :param art_date: the published date, 'YYYY-MM-DD'
+        :param fields: the texts indexed, e.g. the title, keywords and description
+        :return: False if the url was already indexed
+        """
+        cursor = self.conn.execute('INSERT OR IGNORE INTO docs (url, site, date) VALUES (?, ?, ?)',
+                                   (url, site_name, art_date))
+        if not cursor.rowcount:
+            return False
+        doc = cursor.lastrowid
+        self.conn.executemany(
+            'INSERT INTO postings VALUES (?, ?, ?, ?)',
+            [(self.term_id(token), art_date, doc, np.array(positions, dtype=np.uint32).tobytes())
+             for token, positions in token_positions(fields).items()])
+        return True
+
+    def update_from_jsonl(self, file_name, site_name):
+        """
+        Index the articles written to a crawled jsonlines file since the last update
+        :return: number of articles read
+        """
+        return update_from_jsonl(self.conn, file_name, ('url', 'date') + FIELDS,
+                                 lambda url, art_date, *fields: self.add(url, site_name, art_date, fields))
+
+    def postings(self, term, start_date=None, end_date=None, sites=None, docs=None):
+        """
+        Postings of a term within the dates, both included
+        :param docs: only keep the postings of these docs, e.g. the matches of
+                     the previous clauses, selected by SQLite when they are few
+        :return: dictionary of {doc: (date, encoded positions)}
+        """
+        term = self.term_ids.get(term)
+        if term is None or (docs is not None and not docs):
+            return {}
+        query = ('SELECT p.doc, p.date, p.positions FROM postings p JOIN docs d ON d.id = p.doc '
+                 'WHERE p.term = ? AND p.date BETWEEN ? AND ?')
+        params = [term, start_date or '0000-00-00', end_date or '9999-99-99']
+        if sites is not None:
+            query += ' AND d.site IN ({})'.format(','.join('?' * len(sites)))
+            params += list(sites)
+        if docs is not None and len(docs) <= MAX_DOC_PARAMS:
+            query += ' AND p.doc IN ({})'.format(','.join('?' * len(docs)))
+            params += list(docs)
+        rows = self.conn.execute(query, params)
+        if docs is not None:
+            rows = (row for row in rows if row[0] in docs)
+        return {doc: (art_date, positions) for doc, art_date, positions in rows}
+
+    def match_phrase(self, tokens, start_date=None, end_date=None, sites=None, docs=None):
+        """
+        Articles having the tokens at consecutive positions
+        :param docs: only search these docs
+        :return: dictionary of {doc: date}
+        """
+        first = self.postings(tokens[0], start_date, end_date, sites, docs)
+        if len(tokens) == 1:
+            return {doc: art_date for doc, (art_date, _) in first.items()}
+        starts = {doc: np.frombuffer(positions, dtype=np.uint32)
+                  for doc, (_, positions) in first.items()}
+        for k, token in enumerate(tokens[1:], 1):
+            if not starts:
+                break
+            following = self.postings(token, start_date, end_date, sites, starts.keys())
+            starts = {doc: hits for doc, hits in (
+                (doc, np.intersect1d(starts[doc], np.frombuffer(following[doc][1], dtype=np.uint32) - k))
+                for doc in following) if len(hits)}
+        return {doc: first[doc][0] for doc in starts}
+
+    def search(self, query, start_date=None, end_date=None, sites=None):
+        """
+        Articles matching all the clauses of a query
+        :param query: words and double-quoted phrases, e.g. 'covid "gian cach xa hoi"'
+        :param start_date, end_date: 'YYYY-MM-DD', both included
+        :param sites: only search the articles of these sites
+        :return: dictionary of {doc: date}
+        """
+        clauses = parse_query(query)
+        if not clauses:
+            return {}
+        # Start with the rarest clause, the postings of the next ones are only
+        # kept, and their positions decoded, for the docs matched so far
+        counts = {tokens[0]: self.conn.execute('SELECT COUNT(*) FROM postings WHERE term = ?',
+                                               (self.term_ids.get(tokens[0], -1),)).fetchone()[0]
+                  for tokens in clauses}
+        clauses.sort(key=lambda tokens: counts[tokens[0]])
+        matches = None
+        for tokens in clauses:
+            matches = self.match_phrase(tokens, start_date, end_date, sites,
+                                        None if matches is None else matches.keys())
+            if not matches:
+                break
+        return matches
+
+    def day_counts(self, query, start_date=None, end_date=None, sites=None):
+        """
+        :return: list of (date, number of matching articles), sorted by date
+        """
+        return sorted(Counter(self.search(query, start_date, end_date, sites).values()).items())
+
+    def urls(self, query, start_date=None, end_date=None, sites=None, limit=None):
+        """
+        :return: list of (date, site, url) of the matching articles, sorted by date
+        """
+        docs = sorted(self.search(query, start_date, end_date, sites).items(), key=lambda kv: (kv[1], kv[0]))
+        if limit is not None:
+            docs = docs[:limit]
+        rows = []
+        for k in range(0, len(docs), 500):
+            chunk = [doc for doc, _ in docs[k:k + 500]]
+            found = {doc: (art_date, site_name, url) for doc, art_date, site_name, url in self.conn.execute(
+                'SELECT id, date, site, url FROM docs WHERE id IN ({})'.format(','.join('?' * len(chunk))),
+                chunk)}
+            rows.extend(found[doc] for doc in chunk)
+        return rows
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+
+def update_index(site_names, data_dir='data', index_file='data/corpus.sqlite'):
+    """
+    Update the inverted index from the jsonlines files of the sites
+    :return: the InvertedIndex
+    """
+    index = InvertedIndex(index_file)
+    for site_name in site_names:
+        index.update_from_jsonl(os.path.join(data_dir, '{}.jsonl'.format(site_name)), site_name)
+    return index
+
+
+# ------------------------------------------------------------------------------
+# Main function
+# ------------------------------------------------------------------------------
+if __name__ == '__main__':
+    args = argparse.ArgumentParser(description='Inverted index of the crawled articles')
+    args.add_argument('--data_dir', default='data', type=str,
+                      help='Directory of the crawled jsonlines files')
+    args.add_argument('--index_file', default='data/corpus.sqlite', type=str,
+                      help='SQLite file of the inverted index')
+    args.add_argument('--sites', default=None, type=str,
+                      help='Comma-separated names of the online newspapers, '
+                           'defaults to all the jsonlines files of data_dir')
+    args.add_argument('--query', default=None, type=str,
+                      help='Words and double-quoted phrases, all required, matched '
+                           'ignoring case and diacritics, e.g. \'covid "gian cach"\'')
+    args.add_argument('--start_date', default=None, type=str,
+                      help='First published date of the matches, YYYY-MM-DD')
+    args.add_argument('--end_date', default=None, type=str,
+                      help='Last published date of the matches, YYYY-MM-DD')
+    args.add_argument('--urls', action='store_true',
+                      help='Print the urls of the matches instead of the counts per day')
+    args.add_argument('--limit', default=None, type=int,
+                      help='Maximum number of urls printed')
+    args.add_argument('--no_update', action='store_true',
+                      help='Query the index without reading the new crawled articles first')
+    cmd_args = args.parse_args()
+
+    site_names = cmd_args.sites.split(',') if cmd_args.sites else \
+        sorted(f[:-6] for f in os.listdir(cmd_args.data_dir) if f.endswith('.jsonl'))
+    if cmd_args.no_update:
+        index = InvertedIndex(cmd_args.index_file)
+    else:
+        index = update_index(site_names, cmd_args.data_dir, cmd_args.index_file)
+    if cmd_args.query is None:
+        print(f'{len(index)} articles, {len(index.term_ids)} terms')
+    else:
+        sites = cmd_args.sites.split(',') if cmd_args.sites else None
+        if cmd_args.urls:
+            for art_date, site_name, url in index.urls(cmd_args.query, cmd_args.start_date,
+                                                       cmd_args.end_date, sites, cmd_args.limit):
+                print(f'{art_date}  {site_name:<11s} {url}')
+        else:
+            day_counts = index.day_counts(cmd_args.query, cmd_args.start_date, cmd_args.end_date, sites)
+            for art_date, count in day_counts:
+                print(f'{art_date}  {count:6d}')
+            print(f'{sum(count for _, count in day_counts)} articles')
+    index.close()
@@ -5,10 +5,12 @@ Created on 22/02/2021 4:27 pm
 @author: Soan Duong, UOW
 """
 # Standard library imports
-import json
+import os
+import time
 import argparse
-import numpy as np
+import multiprocessing
 from datetime import datetime
+from urllib.parse import urljoin
 
 # Third party imports
 import scrapy
@@ -16,579 +18,390 @@ from scrapy.crawler import CrawlerProcess
 from scrapy.spiders import CrawlSpider, Rule
 from scrapy.linkextractors import LinkExtractor
 
+# Local application imports
+from extraction import SiteExtractor
+from keyword_matcher import KeywordMatcher
+from url_analysers import build_url_analyser
+from frontier import DateWindowFrontier
+from urls import LinkFilter
+from profiles import build_profile, profile_settings, parse_overrides, throughput_summary
+from rollups import update_rollup
+from sharding import open_backend, shard_settings, merge_shard_feeds
+from sitemaps import iter_entries, entry_in_window, robots_sitemaps
+
 
 KEYWORDS = ['coronavirus', 'corona virus', 'covid', 'ncov', 'sars-cov', 'viem phoi']
 START_DATE = datetime(2019, 11, 17, 0, 0, 0)
 END_DATE = datetime(2021, 2, 23, 0, 0, 0)
+KEYWORD_MATCHER = KeywordMatcher(KEYWORDS)
 
 
 def exist_keywords(content):
-    return any(kw in content.lower() for kw in KEYWORDS)
-
-
-class CrawlSpider_vnexpress(CrawlSpider):
-    name = 'vnexpress'
-    allowed_domains = ['vnexpress.net']
-    start_urls = ['https://vnexpress.net/']
-    rules = [Rule(LinkExtractor(allow=['vnexpress.net/.+'],
-                                deny_domains=['shop.vnexpress.net',
-                                              'raovat.vnexpress.net']),
-                  callback='parse_article', follow=True)]
-
-    def parse_article(self, response):
-        print('Got a response from {}'.format(response.url))
-
-        # Extract the source in case response.url is the url of the article
-        art = response.xpath('//body[@data-source="Detail"]')
-        if art:
-            # Extract the published date
-            art_date = art.xpath('//meta[@name="pubdate"]/@content')[0].get()
-            art_date = datetime.fromisoformat(art_date).replace(tzinfo=None)
-            print('Published date: ', art_date)
-
-            # Extract the article information if the published date is within the period of interest
-            if START_DATE <= art_date and \
-                    (END_DATE is None or END_DATE > art_date):
-                art_title = ''
-                art_keywords = ''
-                art_description = ''
-                try:
-                    # Extract the title of the article
-                    art_title = art.xpath('//title/text()').extract()[0]
-
-                    # Extract the keywords of the article
-                    art_keywords = art.xpath('//meta[@name="news_keywords"]/@content')[0].get()
-
-                    # Extract the description of the article
-                    art_description = art.xpath('//meta[@name="description"]/@content')[0].get()
-                except:
-                    print('Error in extracting the content')
-                # Check if the interest keywords are in the title
-                # or news keywords or description
-                if exist_keywords(art_title + art_keywords + art_description):
-                    print('Title: ', art_title)
-                    yield {'date': art_date.strftime('%Y-%m-%d'),
-                           'url': response.url,
-                           'title': art_title,
-                           'keywords': art_keywords,
-                           'description': art_description,
-                           'published_datetime': art_date}
-
-
-class CrawlSpider_laodong(CrawlSpider):
-    name = 'laodong'
-    allowed_domains = ['laodong.vn']
-    start_urls = ['https://laodong.vn/']
-    rules = [Rule(LinkExtractor(allow=['laodong.vn/.+'],
-                                deny=['laodong.vn/video/.+']),
-                  callback='parse_article', follow=True)]
-
-    def parse_article(self, response):
-        print('Got a response from {}'.format(response.url))
-
-        # Extract the source in case response.url is the url of the article
-        art = response.xpath('//body[@class="article-n2"]')
-        if not art:
-            art = response.xpath('//body[@class="article-m2"]')
-        if art:
-            # Extract the published date
-            art_date = art.xpath('//time[@class="f-datetime"]/text()').extract()[0]
-            art_date = datetime.strptime(art_date, "%d/%m/%Y | %H:%M")
-            print('Published date: ', art_date)
-
-            # Extract the article information if the published date is within the period of interest
-            if START_DATE <= art_date and \
-                    (END_DATE is None or END_DATE > art_date):
-                art_title = ''
-                art_keywords = ''
-                art_description = ''
-                try:
-                    # Extract the title of the article
-                    art_title = art.xpath('//title/text()').extract()[0]
-
-                    # Extract the keywords of the article
-                    art_keywords = art.xpath('//meta[@name="keywords"]/@content')[0].get()
-
-                    # Extract the description of the article
-                    art_description = art.xpath('//meta[@name="description"]/@content')[0].get()
-                except:
-                    print('Error in extracting the content')
-
-                # Check if the interest keywords are in the title
-                # or news keywords or description
-                if exist_keywords(art_title + art_keywords + art_description):
-                    print('Title: ', art_title)
-                    yield {'date': art_date.strftime('%Y-%m-%d'),
-                           'url': response.url,
-                           'title': art_title,
-                           'keywords': art_keywords,
-                           'description': art_description,
-                           'published_datetime': art_date}
-
-
-class CrawlSpider_vtv(CrawlSpider):
-    name = 'vtv'
-    allowed_domains = ['vtv.vn']
-    start_urls = ['https://vtv.vn/']
-    rules = [Rule(LinkExtractor(allow=['vtv.vn/.+'],
-                                deny=['vtv.vn/video/.+']),
-                  callback='parse_article', follow=True)]
-
-    def parse_article(self, response):
-        print('Got a response from {}'.format(response.url))
-
-        # Extract the source in case response.url is the url of the article
-        art = response.xpath('//meta[@property="article:section"]')
-        if art:
-            # Extract the published date
-            art_date = art.xpath('//meta[@name="pubdate"]/@content')[0].get()
-            art_date = datetime.fromisoformat(art_date).replace(tzinfo=None)
-            print('Published date: ', art_date)
-
-            # Extract the article information if the published date is within the period of interest
-            if START_DATE <= art_date and \
-                    (END_DATE is None or END_DATE > art_date):
-                art_title = ''
-                art_keywords = ''
-                art_description = ''
-                try:
-                # Extract the title of the article
-                    art_title = art.xpath('//title/text()').extract()[0]
-
-                    # Extract the keywords of the article
-                    art_keywords = art.xpath('//meta[@name="news_keywords"]/@content')[0].get()
-
-                    # Extract the description of the article
-                    art_description = art.xpath('//meta[@name="description"]/@content')[0].get()
-                except:
-                    print('Error in extracting the content')
-
-                # Check if the interest keywords are in the title
-                # or news keywords or description
-                if exist_keywords(art_title + art_keywords + art_description):
-                    print('Title: ', art_title)
-                    yield {'date': art_date.strftime('%Y-%m-%d'),
-                           'url': response.url,
-                           'title': art_title,
-                           'keywords': art_keywords,
-                           'description': art_description,
-                           'published_datetime': art_date}
-
-
-class CrawlSpider_24h(CrawlSpider):
-    name = '24h'
-    allowed_domains = ['24h.com.vn']
-    start_urls = ['https://24h.com.vn/']
-    rules = [Rule(LinkExtractor(allow=['24h.com.vn/.+.html'],
-                                deny=['24h.com.vn/video-.+']),
-                  callback='parse_article', follow=True)]
+    # Match all the keywords in one pass, ignoring case and diacritics
+    return KEYWORD_MATCHER.search(content)
+
+
+# Spec of each online newspaper:
+#   domain, allow, deny, deny_domains: the domain and the link extraction rule
+#   article: XPath selecting an element only present on the article pages
+#   min_url_parts, min_ld_json: extra checks of the article pages
+#   marker: regex matching the raw bytes of every article page, see extraction.py
+#   date: (source, format) of the published date, the source being 'meta:<key>',
+#         'ld+json' or an XPath, the format 'iso', 'iso_padded' or a strptime format,
+#         see dates.py
+#   title, keywords, description: 'title' or 'meta:<key>'
+#   url_id, url_date: article id or date pattern in the urls, see url_analysers.py
+#   deny_paths: regexes of the non-article links of the site, see urls.py
+#   pagination: pattern of the listing pagination, see frontier.py
+#   discovery, rss_urls, sitemap_urls: article discovery, see sitemaps.py
+#   profile: crawl profile overriding DEFAULT_PROFILE, see profiles.py
+SITE_SPECS = {
+    'vnexpress': {'domain': 'vnexpress.net',
+                  'allow': ['vnexpress.net/.+'],
+                  'deny_domains': ['shop.vnexpress.net', 'raovat.vnexpress.net'],
+                  'article': '//body[@data-source="Detail"]',
+                  'marker': r'data-source=.Detail.',
+                  'date': ('meta:pubdate', 'iso'),
+                  'title': 'title',
+                  'keywords': 'meta:news_keywords',
+                  'url_id': r'-(\d+)\.html',
+                  'deny_paths': [r'/chu-de/'],
+                  'rss_urls': ['https://vnexpress.net/rss/tin-moi-nhat.rss'],
+                  'profile': {'concurrency': 16, 'autothrottle_target': 8.}},
+    'laodong': {'domain': 'laodong.vn',
+                'allow': ['laodong.vn/.+'],
+                'deny': ['laodong.vn/video/.+'],
+                'article': '//body[@class="article-n2" or @class="article-m2"]',
+                'marker': r'article-[nm]2',
+                'date': ('//time[@class="f-datetime"]/text()', '%d/%m/%Y | %H:%M'),
+                'title': 'title',
+                'keywords': 'meta:keywords',
+                'url_id': r'-(\d+)\.ldo',
+                'profile': {'concurrency': 4, 'autothrottle_target': 2., 'download_delay': 0.25}},
+    'vtv': {'domain': 'vtv.vn',
+            'allow': ['vtv.vn/.+'],
+            'deny': ['vtv.vn/video/.+'],
+            'article': '//meta[@property="article:section"]',
+            'marker': r'article:section',
+            'date': ('meta:pubdate', 'iso'),
+            'title': 'title',
+            'keywords': 'meta:news_keywords',
+            'url_date': (r'-(\d{8})\d{9}\.htm', '%Y%m%d'),
+            'profile': {'concurrency': 4, 'autothrottle_target': 2., 'download_delay': 0.25}},
+    '24h': {'domain': '24h.com.vn',
+            'allow': ['24h.com.vn/.+.html'],
+            'deny': ['24h.com.vn/video-.+'],
+            'article': '//div[@class="brmCm2 brmCm2x"]',
+            'marker': r'brmCm2 brmCm2x',
+            'min_url_parts': 5,
+            'date': ('meta:pubdate', 'iso'),
+            'title': 'title',
+            'keywords': 'meta:news_keywords',
+            'url_id': r'-c\d+a(\d+)\.html',
+            'rss_urls': ['https://cdn.24h.com.vn/upload/rss/trangchu24h.rss']},
+    'zingnews': {'domain': 'zingnews.vn',
+                 'allow': ['zingnews.vn/.+'],
+                 'article': '//body[@id="page-article"]',
+                 'marker': r'page-article',
+                 'date': ('meta:article:published_time', '%Y-%m-%dT%H:%M:%S%z'),
+                 'title': 'title',
+                 'keywords': 'meta:keywords',
+                 'url_id': r'post(\d+)\.html',
+                 'deny_paths': [r'/tieu-diem/'],
+                 'profile': {'concurrency': 16, 'autothrottle_target': 8.}},
+    'kenh14': {'domain': 'kenh14.vn',
+               'allow': ['kenh14.vn/.+'],
+               'deny_domains': ['video.kenh14.vn'],
+               'article': '//div[@class="knc-content"]',
+               'marker': r'knc-content',
+               'date': ('meta:article:published_time', 'iso'),
+               'title': 'title',
+               'keywords': 'meta:news_keywords',
+               'url_id': r'-(\d+)\.chn'},
+    'dantri': {'domain': 'dantri.com.vn',
+               'allow': ['dantri.com.vn/.+'],
+               'deny': ['dantri.com.vn/video.'],
+               'article': '//body[@data-isrc="articlev2"]',
+               'marker': r'articlev2',
+               'date': ('ld+json', 'iso_padded'),
+               'title': 'meta:title',
+               'keywords': 'meta:keywords',
+               'url_date': (r'-(\d{8})\d{9}\.htm', '%Y%m%d'),
+               'deny_paths': [r'/su-kien/'],
+               'rss_urls': ['https://dantri.com.vn/rss/home.rss'],
+               'profile': {'concurrency': 16, 'autothrottle_target': 8.}},
+    'tuoitre': {'domain': 'tuoitre.vn',
+                'allow': ['tuoitre.vn/.+'],
+                'deny_domains': ['tv.tuoitre.vn'],
+                'article': '//meta[@property="article:section"]',
+                'marker': r'article:section',
+                'date': ('meta:article:published_time', 'iso'),
+                'title': 'meta:og:title',
+                'keywords': 'meta:keywords',
+                'url_date': (r'-(\d{8})\d{9}\.htm', '%Y%m%d'),
+                'rss_urls': ['https://tuoitre.vn/rss/tin-moi-nhat.rss'],
+                'profile': {'concurrency': 16, 'autothrottle_target': 8.}},
+    'vietnamnet': {'domain': 'vietnamnet.vn',
+                   'allow': ['vietnamnet.vn/.+'],
+                   'deny': ['vietnamnet.vn/vn/talkshow/.'],
+                   'article': '//body',
+                   'marker': r'application/ld\+json',
+                   'min_ld_json': 2,
+                   'date': ('ld+json', 'iso'),
+                   'title': 'title',
+                   'keywords': 'meta:news_keywords',
+                   'url_id': r'-(\d+)\.html',
+                   'rss_urls': ['https://vietnamnet.vn/rss/tin-moi-nhat.rss']},
+    'cafef': {'domain': 'cafef.vn',
+              'allow': ['cafef.vn/.+'],
+              'article': '//meta[@property="article:section"]',
+              'marker': r'article:section',
+              'date': ('ld+json', 'iso_padded'),
+              'title': 'title',
+              'keywords': 'meta:news_keywords',
+              'url_id': r'-(\d+)\.chn'},
+    'thanhnien': {'domain': 'thanhnien.vn',
+                  'allow': ['thanhnien.vn/.+'],
+                  'deny': ['thanhnien.vn/video/.+'],
+                  'article': '//div[@class="pswp-content"]',
+                  'marker': r'pswp-content',
+                  'date': ('meta:article:published_time', 'iso_padded'),
+                  'title': 'title',
+                  'keywords': 'meta:news_keywords',
+                  'url_id': r'-(?:post)?(\d+)\.html',
+                  'rss_urls': ['https://thanhnien.vn/rss/home.rss']},
+}
+
+
+class NewsSpider(CrawlSpider):
+    """
+    Generic crawler of an online newspaper, driven by the spec of the site
+    """
+    spec = None
+    site = None
+    seen_store = None
+    candidate_store = None
+    metrics = None
+
+    @classmethod
+    def update_settings(cls, settings):
+        super().update_settings(settings)
+        # Keep the scheduler state of each site in its own job directory
+        if settings.get('JOBDIR'):
+            settings.set('JOBDIR', os.path.join(settings.get('JOBDIR'), cls.name),
+                         priority='spider')
+
+    def __init__(self, *args, data_dir='data/', discovery=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Set how the articles are discovered: 'links', 'sitemap' or 'rss'
+        self.discovery = discovery or self.spec.get('discovery', 'links')
+        # Calibrate the url analyser on the articles crawled so far
+        self.url_analyser = build_url_analyser(self.name, self.spec,
+                                               '{}/{}.jsonl'.format(data_dir, self.name))
+        self.frontier = DateWindowFrontier(START_DATE, END_DATE,
+                                           pagination_pattern=self.spec.get('pagination'))
+        self.link_filter = LinkFilter(self.spec.get('deny_paths', ()))
+
+    async def start(self):
+        for request in self.start_requests():
+            yield request
+
+    def start_requests(self):
+        if self.discovery == 'sitemap':
+            # Get the sitemaps declared in robots.txt
+            yield scrapy.Request(urljoin(self.start_urls[0], '/robots.txt'),
+                                 callback=self.parse_robots,
+                                 meta={'handle_httpstatus_all': True})
+        elif self.discovery == 'rss':
+            for url in self.spec.get('rss_urls', []):
+                yield scrapy.Request(url, callback=self.parse_feed)
+        else:
+            for url in self.start_urls:
+                yield scrapy.Request(url, dont_filter=True)
+
+    def parse_robots(self, response):
+        sitemap_urls = self.spec.get('sitemap_urls', [])
+        if response.status == 200:
+            sitemap_urls = sitemap_urls + robots_sitemaps(response.text)
+        if not sitemap_urls:
+            sitemap_urls = [urljoin(self.start_urls[0], '/sitemap.xml')]
+        for url in sitemap_urls:
+            yield scrapy.Request(url, callback=self.parse_feed)
+
+    def parse_feed(self, response):
+        # Queue the child sitemaps and the articles that may be within the period of interest
+        for kind, loc, lastmod, published in iter_entries(response.body):
+            if not entry_in_window(lastmod, published, START_DATE, END_DATE):
+                self.crawler.stats.inc_value('discovery/skipped')
+                continue
+            if kind == 'sitemap':
+                yield scrapy.Request(loc, callback=self.parse_feed)
+            else:
+                self.crawler.stats.inc_value('discovery/articles')
+                yield scrapy.Request(loc, callback=self.parse_article)
+
+    def filter_links(self, links):
+        # Drop the non-article links and schedule the variants of a page once
+        kept = self.link_filter.filter([link.url for link in links])
+        for k, url in kept:
+            links[k].url = url
+        self.crawler.stats.inc_value('links/extracted', len(links))
+        self.crawler.stats.inc_value('links/kept', len(kept))
+        return [links[k] for k, _ in kept]
+
+    def closed(self, reason):
+        n_extracted = self.crawler.stats.get_value('links/extracted', 0)
+        if n_extracted:
+            ratio = 1 - self.crawler.stats.get_value('links/kept', 0) / n_extracted
+            self.crawler.stats.set_value('links/reduction_ratio', round(ratio, 4))
+            self.logger.info('Link filtering removed %.1f%% of the %d extracted links',
+                             100 * ratio, n_extracted)
+
+    def filter_request(self, request, response):
+        # Stop paginating the listings that have gone past the period of interest
+        if not self.frontier.follow(request.url, response.url):
+            self.crawler.stats.inc_value('frontier/pagination_stopped')
+            return None
+        request.meta['source_page'] = response.url
+        if self.url_analyser is None:
+            return request
+
+        # Record the estimated date on the listing page
+        est_date, _ = self.url_analyser.estimate(request.url)
+        if est_date is not None:
+            request.meta['estimated'] = True
+            self.frontier.observe(response.url, est_date)
+
+        # Drop the links to articles confidently published outside the period of interest
+        if self.url_analyser.in_window(request.url, START_DATE, END_DATE) is False:
+            self.crawler.stats.inc_value('url_date/dropped')
+            return None
+
+        # Fetch the articles estimated close to the period first
+        request.priority += self.frontier.priority(est_date)
+        return request
+
+    def record_article(self, response, art_date):
+        if self.seen_store is not None:
+            # The article pages are not fetched again by the next runs
+            self.seen_store.add(response.url)
+        if self.url_analyser is not None:
+            self.url_analyser.add_observation(response.url, art_date)
+        if 'source_page' in response.meta and not response.meta.get('estimated'):
+            self.frontier.observe(response.meta['source_page'], art_date)
 
     def parse_article(self, response):
-        print('Got a response from {}'.format(response.url))
-
-        # Extract the source in case response.url is the url of the article
-        art = response.xpath('//div[@class="brmCm2 brmCm2x"]')
-        if art and len(response.url.split(('/'))) > 4:
-            # Extract the published date
-            art_date = art.xpath('//meta[@name="pubdate"]/@content')[0].get()
-            art_date = datetime.fromisoformat(art_date).replace(tzinfo=None)
-            print('Published date: ', art_date)
-
-            # Extract the article information if the published date is within the period of interest
-            if START_DATE <= art_date and \
-                    (END_DATE is None or END_DATE > art_date):
-                art_title = ''
-                art_keywords = ''
-                art_description = ''
-                try:
-                # Extract the title of the article
-                    art_title = art.xpath('//title/text()').extract()[0]
-
-                    # Extract the keywords of the article
-                    art_keywords = art.xpath('//meta[@name="news_keywords"]/@content')[0].get()
-
-                    # Extract the description of the article
-                    art_description = art.xpath('//meta[@name="description"]/@content')[0].get()
-                except:
-                    print('Error in extracting the content')
-
-                # Check if the interest keywords are in the title
-                # or news keywords or description
-                if exist_keywords(art_title + art_keywords + art_description):
-                    print('Title: ', art_title)
-                    yield {'date': art_date.strftime('%Y-%m-%d'),
-                           'url': response.url,
-                           'title': art_title,
-                           'keywords': art_keywords,
-                           'description': art_description,
-                           'published_datetime': art_date}
-
-
-class CrawlSpider_zingnews(CrawlSpider):
-    name = 'zingnews'
-    allowed_domains = ['zingnews.vn']
-    start_urls = ['https://zingnews.vn/']
-    rules = [Rule(LinkExtractor(allow=['zingnews.vn/.+']),
-                  callback='parse_article', follow=True)]
-
-    def parse_article(self, response):
-        print('Got a response from {}'.format(response.url))
-
-        # Extract the source in case response.url is the url of the article
-        art = response.xpath('//body[@id="page-article"]')
-        if art:
-            # Extract the published date
-            art_date = art.xpath('//meta[@property="article:published_time"]/@content')[0].get()
-            art_date = datetime.strptime(art_date, "%Y-%m-%dT%H:%M:%S%z").replace(tzinfo=None)
-            print('Published date: ', art_date)
-
-            # Extract the article information if the published date is within the period of interest
-            if START_DATE <= art_date and \
-                    (END_DATE is None or END_DATE > art_date):
-                art_title = ''
-                art_keywords = ''
-                art_description = ''
-                try:
-                    # Extract the title of the article
-                    art_title = art.xpath('//title/text()').extract()[0]
-
-                    # Extract the keywords of the article
-                    art_keywords = art.xpath('//meta[@name="keywords"]/@content')[0].get()
-
-                    # Extract the description of the article
-                    art_description = art.xpath('//meta[@name="description"]/@content')[0].get()
-                except:
-                    print('Error in extracting the content')
-
-                # Check if the interest keywords are in the title
-                # or news keywords or description
-                if exist_keywords(art_title + art_keywords + art_description):
-                    print('Title: ', art_title)
-                    yield {'date': art_date.strftime('%Y-%m-%d'),
-                           'url': response.url,
-                           'title': art_title,
-                           'keywords': art_keywords,
-                           'description': art_description,
-                           'published_datetime': art_date}
-
-
-class CrawlSpider_kenh14(CrawlSpider):
-    name = 'kenh14'
-    allowed_domains = ['kenh14.vn']
-    start_urls = ['https://kenh14.vn/']
-    rules = [Rule(LinkExtractor(allow=['kenh14.vn/.+'],
-                                deny_domains=['video.kenh14.vn']),
-                  callback='parse_article', follow=True)]
-
-    def parse_article(self, response):
-        print('Got a response from {}'.format(response.url))
-
-        # Extract the source in case response.url is the url of the article
-        art = response.xpath('//div[@class="knc-content"]')
-        if art:
-            # Extract the published date
-            art_date = art.xpath('//meta[@property="article:published_time"]/@content')[0].get()
-            art_date = datetime.fromisoformat(art_date).replace(tzinfo=None)
-            print('Published date: ', art_date)
-
-            # Extract the article information if the published date is within the period of interest
-            if START_DATE <= art_date and \
-                    (END_DATE is None or END_DATE > art_date):
-                art_title = ''
-                art_keywords = ''
-                art_description = ''
-                try:
-                    # Extract the title of the article
-                    art_title = art.xpath('//title/text()').extract()[0]
-
-                    # Extract the keywords of the article
-                    art_keywords = art.xpath('//meta[@name="news_keywords"]/@content')[0].get()
-
-                    # Extract the description of the article
-                    art_description = art.xpath('//meta[@name="description"]/@content')[0].get()
-                except:
-                    print('Error in extracting the content')
-
-                # Check if the interest keywords are in the title
-                # or news keywords or description
-                if exist_keywords(art_title + art_keywords + art_description):
-                    print('Title: ', art_title)
-                    yield {'date': art_date.strftime('%Y-%m-%d'),
-                           'url': response.url,
-                           'title': art_title,
-                           'keywords': art_keywords,
-                           'description': art_description,
-                           'published_datetime': art_date}
-
-
-class CrawlSpider_dantri(CrawlSpider):
-    name = 'dantri'
-    allowed_domains = ['dantri.com.vn']
-    start_urls = ['https://dantri.com.vn/']
-    rules = [Rule(LinkExtractor(allow=['dantri.com.vn/.+'],
-                                deny=['dantri.com.vn/video.']),
-                  callback='parse_article', follow=True)]
-
-    def parse_article(self, response):
-        print('Got a response from {}'.format(response.url))
-
-        # Extract the source in case response.url is the url of the article
-        art = response.xpath('//body[@data-isrc="articlev2"]')
-        if art:
-            # Extract the published date
-            scripts = art.xpath('//script[@type="application/ld+json"]/text()')
-            for script in scripts:
-                script = json.loads(script.get())
-                if 'datePublished' in script:
-                    art_date = script['datePublished']
-                    break
-            if '.' not in art_date:
-                art_date = art_date + '.'
-            art_date = datetime.fromisoformat(art_date.ljust(23, '0')).replace(tzinfo=None)
-            print('Published date: ', art_date)
-
-            # Extract the article information if the published date is within the period of interest
-            if START_DATE <= art_date and \
-                    (END_DATE is None or END_DATE > art_date):
-                art_title = ''
-                art_keywords = ''
-                art_description = ''
-                try:
-                    # Extract the title of the article
-                    art_title = art.xpath('//meta[@name="title"]/@content')[0].get()
-
-                    # Extract the keywords of the article
-                    art_keywords = art.xpath('//meta[@name="keywords"]/@content')[0].get()
-
-                    # Extract the description of the article
-                    art_description = art.xpath('//meta[@name="description"]/@content')[0].get()
-                except:
-                    print('Error in extracting the content')
-
-                # Check if the interest keywords are in the title
-                # or news keywords or description
-                if exist_keywords(art_title + art_keywords + art_description):
-                    print('Title: ', art_title)
-                    yield {'date': art_date.strftime('%Y-%m-%d'),
-                           'url': response.url,
-                           'title': art_title,
-                           'keywords': art_keywords,
-                           'description': art_description,
-                           'published_datetime': art_date}
-
-
-class CrawlSpider_tuoitre(CrawlSpider):
-    name = 'tuoitre'
-    allowed_domains = ['tuoitre.vn']
-    start_urls = ['https://tuoitre.vn/']
-    rules = [Rule(LinkExtractor(allow=['tuoitre.vn/.+'],
-                                deny_domains=['tv.tuoitre.vn']),
-                  callback='parse_article', follow=True)]
+        self.logger.debug('Got a response from %s', response.url)
+        tic = time.perf_counter()
+        art = self.extract_article(response)
+        if self.metrics is not None:
+            self.metrics.observe('parse_seconds', time.perf_counter() - tic)
+        if art is not None:
+            yield art
+
+    def extract_article(self, response):
+        # Reject the non-article and out-of-period pages before parsing them
+        reason, art_date = self.site.sniff(response.body, START_DATE, END_DATE)
+        if reason is not None:
+            self.crawler.stats.inc_value('sniff/rejected/{}'.format(reason))
+            if 'rule' not in response.meta:
+                # No links are extracted from the page either, it is never parsed
+                self.crawler.stats.inc_value('sniff/saved_parses')
+            if art_date is not None:
+                self.record_article(response, art_date)
+            return None
+
+        # Extract the article fields in case response.url is the url of the article
+        try:
+            art = self.site.extract(response.selector.root, response.url)
+        except ValueError as e:
+            self.crawler.stats.inc_value('extraction/failed/published_datetime')
+            self.logger.warning('Error in extracting the published date of %s: %s', response.url, e)
+            return None
+        if art is None:
+            return None
+        self.crawler.stats.inc_value('articles/pages')
+        for field in ['published_datetime', 'title', 'keywords', 'description']:
+            if not art[field]:
+                self.crawler.stats.inc_value('extraction/failed/{}'.format(field))
+        if art['published_datetime'] is None:
+            return None
+        art_date = art['published_datetime']
+        self.logger.debug('Published date: %s', art_date)
+        self.record_article(response, art_date)
+
+        # Extract the article information if the published date is within the period of interest
+        if START_DATE <= art_date and \
+                (END_DATE is None or END_DATE > art_date):
+            self.crawler.stats.inc_value('articles/in_window')
+            item = {'date': art_date.strftime('%Y-%m-%d'),
+                    'url': response.url,
+                    'title': art['title'],
+                    'keywords': art['keywords'],
+                    'description': art['description'],
+                    'published_datetime': art_date}
+            # Keep every in-window article to re-filter it offline with other keywords
+            if self.candidate_store is not None:
+                self.candidate_store.write(item)
+            # Check if the interest keywords are in the title
+            # or news keywords or description
+            if exist_keywords(art['title'] + art['keywords'] + art['description']):
+                self.crawler.stats.inc_value('articles/keyword_hits')
+                self.logger.debug('Title: %s', art['title'])
+                return item
+        return None
+
+
+def make_spider(site_name, spec, overrides=None):
+    """
+    Create the crawler class of a site from its spec
+    :param site_name: name of the online newspaper, e.g. vnexpress
+    :param spec: the spec of the site, see SITE_SPECS
+    :param overrides: dictionary overriding the crawl profile of the spec
+    :return: a subclass of NewsSpider
+    """
+    domain = spec['domain']
+    rules = [Rule(LinkExtractor(allow=spec['allow'],
+                                deny=spec.get('deny', ()),
+                                deny_domains=spec.get('deny_domains', ())),
+                  callback='parse_article', follow=True,
+                  process_links='filter_links', process_request='filter_request')]
+    return type('CrawlSpider_{}'.format(site_name), (NewsSpider,),
+                {'name': site_name,
+                 'allowed_domains': [domain],
+                 'start_urls': ['https://{}/'.format(domain)],
+                 'rules': rules,
+                 'custom_settings': profile_settings(build_profile(spec, overrides)),
+                 'spec': spec,
+                 'site': SiteExtractor(site_name, spec)})
+
+
+CRAWLERs = {site_name: make_spider(site_name, spec)
+            for site_name, spec in SITE_SPECS.items()}
+
+
+def run_crawl(site_names, settings, spider_kwargs, overrides=None):
+    """
+    Crawl the sites in a single reactor, each with its own crawl profile, and
+    print the requests per second achieved by each site
+    :param overrides: dictionary of {site name: profile overrides}, see profiles.py
+    """
+    process = CrawlerProcess(settings)
+    for site_name in site_names:
+        spidercls = CRAWLERs[site_name]
+        if overrides and overrides.get(site_name):
+            spidercls = make_spider(site_name, SITE_SPECS[site_name], overrides[site_name])
+        process.crawl(spidercls, **spider_kwargs)
+    crawlers = list(process.crawlers)
+    process.start()
 
-    def parse_article(self, response):
-        print('Got a response from {}'.format(response.url))
-
-        # Extract the source in case response.url is the url of the article
-        art = response.xpath('//meta[@property="article:section"]')
-        if art:
-            # Extract the published date
-            art_date = art.xpath('//meta[@property="article:published_time"]/@content')[0].get()
-            art_date = datetime.fromisoformat(art_date).replace(tzinfo=None)
-            print('Published date: ', art_date)
-
-            # Extract the article information if the published date is within the period of interest
-            if START_DATE <= art_date and \
-                    (END_DATE is None or END_DATE > art_date):
-                art_title = ''
-                art_keywords = ''
-                art_description = ''
-                try:
-                    # Extract the title of the article
-                    art_title = art.xpath('//meta[@property="og:title"]/@content')[0].get()
-
-                    # Extract the keywords of the article
-                    art_keywords = art.xpath('//meta[@name="keywords"]/@content')[0].get()
-
-                    # Extract the description of the article
-                    art_description = art.xpath('//meta[@name="description"]/@content')[0].get()
-                except:
-                    print('Error in extracting the content')
-
-                # Check if the interest keywords are in the title
-                # or news keywords or description
-                if exist_keywords(art_title + art_keywords + art_description):
-                    print('Title: ', art_title)
-                    yield {'date': art_date.strftime('%Y-%m-%d'),
-                           'url': response.url,
-                           'title': art_title,
-                           'keywords': art_keywords,
-                           'description': art_description,
-                           'published_datetime': art_date}
-
-
-class CrawlSpider_vietnamnet(CrawlSpider):
-    name = 'vietnamnet'
-    allowed_domains = ['vietnamnet.vn']
-    start_urls = ['https://vietnamnet.vn/']
-    rules = [Rule(LinkExtractor(allow=['vietnamnet.vn/.+'],
-                                deny=['vietnamnet.vn/vn/talkshow/.']),
-                  callback='parse_article', follow=True)]
+    print('{:<11s} {:>9s} {:>9s} {:>9s} {:>8s}'.format('site', 'requests', 'responses',
+                                                    'seconds', 'req/s'))
+    for site_name, n_requests, n_responses, elapsed, rate in throughput_summary(crawlers):
+        print('{:<11s} {:9d} {:9d} {:9.0f} {:8.2f}'.format(site_name, n_requests, n_responses,
+                                                          elapsed, rate))
 
-    def parse_article(self, response):
-        print('Got a response from {}'.format(response.url))
-
-        # Extract the source in case response.url is the url of the article
-        art = response.xpath('//body')
-        scripts = art.xpath('//script[@type="application/ld+json"]/text()')
-        if art and len(scripts) > 1:
-            # Extract the published date
-            for script in scripts:
-                script = json.loads(script.get())
-                if 'datePublished' in script:
-                    art_date = script['datePublished']
-                    break
-            art_date = datetime.fromisoformat(art_date).replace(tzinfo=None)
-            print('Published date: ', art_date)
-
-            # Extract the article information if the published date is within the period of interest
-            if START_DATE <= art_date and \
-                    (END_DATE is None or END_DATE > art_date):
-                art_title = ''
-                art_keywords = ''
-                art_description = ''
-                try:
-                    # Extract the title of the article
-                    art_title = art.xpath('//title/text()').extract()[0]
-
-                    # Extract the keywords of the article
-                    art_keywords = art.xpath('//meta[@name="news_keywords"]/@content')[0].get()
-
-                    # Extract the description of the article
-                    art_description = art.xpath('//meta[@name="description"]/@content')[0].get()
-                except:
-                    print('Error in extracting the content')
-
-                # Check if the interest keywords are in the title
-                # or news keywords or description
-                if exist_keywords(art_title + art_keywords + art_description):
-                    print('Title: ', art_title)
-                    yield {'date': art_date.strftime('%Y-%m-%d'),
-                           'url': response.url,
-                           'title': art_title,
-                           'keywords': art_keywords,
-                           'description': art_description,
-                           'published_datetime': art_date}
-
-
-class CrawlSpider_cafef(CrawlSpider):
-    name = 'cafef'
-    allowed_domains = ['cafef.vn']
-    start_urls = ['https://cafef.vn/']
-    rules = [Rule(LinkExtractor(allow=['cafef.vn/.+']),
-                  callback='parse_article', follow=True)]
 
-    def parse_article(self, response):
-        print('Got a response from {}'.format(response.url))
-
-        # Extract the source in case response.url is the url of the article
-        art = response.xpath('//meta[@property="article:section"]')
-        if art:
-            # Extract the published date
-            scripts = art.xpath('//script[@type="application/ld+json"]/text()')
-            for script in scripts:
-                script = json.loads(script.get())
-                if 'datePublished' in script:
-                    art_date = script['datePublished']
-                    break
-            if '.' not in art_date:
-                art_date = art_date + '.'
-            art_date = datetime.fromisoformat(art_date.ljust(23, '0')).replace(tzinfo=None)
-            print('Published date: ', art_date)
-
-            # Extract the article information if the published date is within the period of interest
-            if START_DATE <= art_date and \
-                    (END_DATE is None or END_DATE > art_date):
-                art_title = ''
-                art_keywords = ''
-                art_description = ''
-                try:
-                    # Extract the title of the article
-                    art_title = art.xpath('//title/text()').extract()[0]
-
-                    # Extract the keywords of the article
-                    art_keywords = art.xpath('//meta[@name="news_keywords"]/@content')[0].get()
-
-                    # Extract the description of the article
-                    art_description = art.xpath('//meta[@name="description"]/@content')[0].get()
-                except:
-                    print('Error in extracting the content')
-
-                # Check if the interest keywords are in the title
-                # or news keywords or description
-                if exist_keywords(art_title + art_keywords + art_description):
-                    print('Title: ', art_title)
-                    yield {'date': art_date.strftime('%Y-%m-%d'),
-                           'url': response.url,
-                           'title': art_title,
-                           'keywords': art_keywords,
-                           'description': art_description,
-                           'published_datetime': art_date}
-
-
-class CrawlSpider_thanhnien(CrawlSpider):
-    name = 'thanhnien'
-    allowed_domains = ['thanhnien.vn']
-    start_urls = ['https://thanhnien.vn/']
-    rules = [Rule(LinkExtractor(allow=['thanhnien.vn/.+'],
-                                deny=['thanhnien.vn/video/.+']),
-                  callback='parse_article', follow=True)]
-
-    def parse_article(self, response):
-        print('Got a response from {}'.format(response.url))
-
-        # Extract the source in case response.url is the url of the article
-        art = response.xpath('//div[@class="pswp-content"]')
-        if art:
-            # Extract the published date
-            art_date = art.xpath('//meta[@property="article:published_time"]/@content')[0].get()
-            art_date = datetime.fromisoformat(art_date.ljust(23, '0')).replace(tzinfo=None)
-            print('Published date: ', art_date)
-
-            # Extract the article information if the published date is within the period of interest
-            if START_DATE <= art_date and \
-                    (END_DATE is None or END_DATE > art_date):
-                # Extract the title of the article
-                art_title = art.xpath('//title/text()').extract()[0]
-
-                # Extract the keywords of the article
-                art_keywords = art.xpath('//meta[@name="news_keywords"]/@content')[0].get()
-
-                # Extract the description of the article
-                art_description = art.xpath('//meta[@name="description"]/@content')[0].get()
-
-                # Check if the interest keywords are in the title
-                # or news keywords or description
-                if exist_keywords(art_title + art_keywords + art_description):
-                    print('Title: ', art_title)
-                    yield {'date': art_date.strftime('%Y-%m-%d'),
-                           'url': response.url,
-                           'title': art_title,
-                           'keywords': art_keywords,
-                           'description': art_description,
-                           'published_datetime': art_date}
-
-
-CRAWLERs = {'vnexpress': CrawlSpider_vnexpress,
-            'laodong': CrawlSpider_laodong,
-            'vtv': CrawlSpider_vtv,
-            '24h': CrawlSpider_24h,
-            'zingnews': CrawlSpider_zingnews,
-            'kenh14': CrawlSpider_kenh14,
-            'dantri': CrawlSpider_dantri,
-            'tuoitre': CrawlSpider_tuoitre,
-            'vietnamnet': CrawlSpider_vietnamnet,
-            'cafef': CrawlSpider_cafef,
-            'thanhnien': CrawlSpider_thanhnien}
 # ------------------------------------------------------------------------------
 # Main function
 # ------------------------------------------------------------------------------
@@ -596,21 +409,163 @@ if __name__ == '__main__':
     args = argparse.ArgumentParser(description='Main file')
     args.add_argument('--site_name', default='kenh14', type=str,
                       help='Name of the online newspaper, e.g. vnexpress and laodong.')
+    args.add_argument('--sites', default=None, type=str,
+                      help='Comma-separated names of the online newspapers to crawl '
+                           'together, or "all". Overrides --site_name.')
+    args.add_argument('--n_procs', default=1, type=int,
+                      help='Number of processes the sites are sharded across, '
+                           '0 for the number of cores')
     args.add_argument('--out_dir', default=None, type=str,
                       help='Directory for saving the output jsonlines file')
+    args.add_argument('--seen_dir', default=None, type=str,
+                      help='Directory of the seen-url stores, defaults to <out_dir>/seen. '
+                           'Pass an empty string to crawl the known articles again.')
+    args.add_argument('--job_dir', default=None, type=str,
+                      help='Directory persisting the scheduler state so that an '
+                           'interrupted crawl resumes where it stopped')
+    args.add_argument('--ram_budget', default=10000, type=int,
+                      help='Number of pending requests kept in memory per site, the other '
+                           'ones are spilled to disk (see spill_queue.py), 0 for no limit')
+    args.add_argument('--parquet_dir', default=None, type=str,
+                      help='Root directory of the columnar store also written by the crawl, '
+                           'see columnar_store.py')
+    args.add_argument('--candidate_dir', default=None, type=str,
+                      help='Root directory of the store of all the in-window articles, with or '
+                           'without the keywords, to re-filter them offline (see candidates.py)')
+    args.add_argument('--revalidation_dir', default=None, type=str,
+                      help='Directory of the ETag and Last-Modified validators of the listing '
+                           'pages, revalidated by the next runs instead of downloaded again '
+                           '(see revalidation.py)')
+    args.add_argument('--http_archive', default=None, type=str,
+                      help='Directory of the response archives, see http_archive.py')
+    args.add_argument('--archive_mode', default='record', choices=['record', 'replay'],
+                      help='Record the fetched responses to the archive, or replay '
+                           'the crawl from the archive with no network')
+    args.add_argument('--metrics_dir', default=None, type=str,
+                      help='Directory of the crawl metrics files, defaults to <out_dir>/metrics. '
+                           'Pass an empty string to disable the metrics.')
+    args.add_argument('--metrics_format', default='prom', choices=['prom', 'json'],
+                      help='Format of the metrics files, Prometheus text or JSON')
+    args.add_argument('--log_level', default='INFO', type=str,
+                      help='Logging level, DEBUG to print every fetched page')
+    args.add_argument('--profiles', default=None, type=str,
+                      help='JSON file of the crawl profile overrides of the sites, '
+                           'see profiles.py')
+    args.add_argument('--profile', default=[], action='append',
+                      help='Crawl profile override, e.g. depth_limit=10 for all the sites '
+                           'or vnexpress.concurrency=16, may be repeated')
+    args.add_argument('--discovery', default=None, choices=['links', 'sitemap', 'rss'],
+                      help='How to discover the articles, defaults to the one of the site spec')
+    args.add_argument('--shards', default=0, type=int,
+                      help='Number of shards of a sharded crawl of a single site, each crawled '
+                           'by its own worker process (see sharding.py), 0 to disable')
+    args.add_argument('--shard_ids', default=None, type=str,
+                      help='Comma-separated shards run by this machine, all by default. '
+                           'The machine running shard 0 resets the backend unless the crawl '
+                           'is resumed from --job_dir, start it first.')
+    args.add_argument('--shard_reset', action='store_true',
+                      help='Empty the shared frontier and seen urls before the crawl, even '
+                           'when resuming it from --job_dir')
+    args.add_argument('--shard_backend', default=None, type=str,
+                      help='SQLite file or redis:// url of the shared frontier and seen urls, '
+                           'defaults to <out_dir>/shards/<site>.sqlite')
     cmd_args = args.parse_args()
 
     assert cmd_args.site_name is not None, "Please specify the name of the online newspaper"
     if cmd_args.out_dir is None:
         cmd_args.out_dir = 'data/'
-    # Set the output filename
-    FILE_NAME = '{}/{}.jsonl'.format(cmd_args.out_dir, cmd_args.site_name)
-    SETTINGS = {'USER_AGENT': 'Mozilla/4.0 (compatible; MSIE 7.0; Windows NT 5.1)',
-                'FEED_FORMAT': 'jsonlines',
+    if cmd_args.seen_dir is None:
+        cmd_args.seen_dir = os.path.join(cmd_args.out_dir, 'seen')
+    if cmd_args.metrics_dir is None:
+        cmd_args.metrics_dir = os.path.join(cmd_args.out_dir, 'metrics')
+    if cmd_args.http_archive is not None and cmd_args.archive_mode == 'replay':
+        # Extract again every archived article
+        cmd_args.seen_dir = ''
+    site_names = [cmd_args.site_name]
+    if cmd_args.sites == 'all':
+        site_names = list(CRAWLERs)
+    elif cmd_args.sites is not None:
+        site_names = cmd_args.sites.split(',')
+    unknown = [site_name for site_name in site_names if site_name not in CRAWLERs]
+    assert not unknown, "Unknown online newspapers: {}".format(', '.join(unknown))
+
+    # Set the output filename, one per site
+    FILE_NAME = '{}/%(name)s.jsonl'.format(cmd_args.out_dir)
+    METRICS_FILE = None
+    if cmd_args.metrics_dir:
+        METRICS_FILE = '{}/%(name)s.{}'.format(cmd_args.metrics_dir, cmd_args.metrics_format)
+    SETTINGS = {'FEED_FORMAT': 'jsonlines',
                 'FEED_URI': FILE_NAME,
-                'CONCURRENT_ITEMS': 1}
-
-    process = CrawlerProcess(SETTINGS)
-    process.crawl(CRAWLERs[cmd_args.site_name])
-    process.start()
-    print('Done')
\ No newline at end of file
+                'FEED_EXPORT_ENCODING': 'utf-8',
+                'CONCURRENT_ITEMS': 1,
+                'LOG_LEVEL': cmd_args.log_level,
+                'SEEN_DIR': cmd_args.seen_dir,
+                'JOBDIR': cmd_args.job_dir,
+                'HTTP_ARCHIVE': cmd_args.http_archive,
+                'HTTP_ARCHIVE_MODE': cmd_args.archive_mode,
+                'DOWNLOADER_MIDDLEWARES': {'middlewares.SeenUrlMiddleware': 50,
+                                           'http_archive.HttpArchiveMiddleware': 60},
+                'EXTENSIONS': {'metrics.CrawlMetrics': 500},
+                'METRICS_FILE': METRICS_FILE,
+                'METRICS_INTERVAL': 30,
+                'ROLLUP_DIR': os.path.join(cmd_args.out_dir, 'rollups'),
+                'ITEM_PIPELINES': {'pipelines.DeduplicationPipeline': 100,
+                                   'pipelines.RollupPipeline': 850,
+                                   'pipelines.SeenUrlPipeline': 900}}
+    if cmd_args.ram_budget > 0:
+        SETTINGS['SCHEDULER_MEMORY_QUEUE'] = 'spill_queue.SpillingLifoQueue'
+        SETTINGS['SCHEDULER_RAM_BUDGET'] = cmd_args.ram_budget
+    if cmd_args.parquet_dir is not None:
+        SETTINGS['PARQUET_DIR'] = cmd_args.parquet_dir
+        SETTINGS['ITEM_PIPELINES']['columnar_store.ParquetExportPipeline'] = 800
+    if cmd_args.revalidation_dir is not None:
+        SETTINGS['REVALIDATION_DIR'] = cmd_args.revalidation_dir
+        SETTINGS['DOWNLOADER_MIDDLEWARES']['revalidation.RevalidationMiddleware'] = 70
+    if cmd_args.candidate_dir is not None:
+        SETTINGS['CANDIDATE_DIR'] = cmd_args.candidate_dir
+        SETTINGS['EXTENSIONS']['candidates.CandidateStore'] = 510
+    SPIDER_KWARGS = {'data_dir': cmd_args.out_dir,
+                     'discovery': cmd_args.discovery}
+    OVERRIDES = parse_overrides(site_names, cmd_args.profiles, cmd_args.profile)
+    for site_name in site_names:
+        # Check the overrides before starting the crawls
+        build_profile(SITE_SPECS[site_name], OVERRIDES[site_name])
+
+    n_procs = cmd_args.n_procs or os.cpu_count()
+    n_procs = min(n_procs, len(site_names))
+    if cmd_args.shards > 1:
+        assert len(site_names) == 1, "A sharded crawl only crawls a single online newspaper"
+        site_name = site_names[0]
+        backend_uri = cmd_args.shard_backend or \
+            os.path.join(cmd_args.out_dir, 'shards', '{}.sqlite'.format(site_name))
+        shard_ids = [int(k) for k in cmd_args.shard_ids.split(',')] if cmd_args.shard_ids \
+            else list(range(cmd_args.shards))
+        # Keep the shared frontier and seen urls of an interrupted crawl resumed from its job
+        # directories, only a new crawl starts from an empty backend
+        backend = open_backend(backend_uri, cmd_args.shards)
+        resumed = cmd_args.job_dir is not None and os.path.isdir(os.path.join(
+            cmd_args.job_dir, 'shard-0-of-{}'.format(cmd_args.shards), site_name)) and \
+            not backend.is_finished()
+        if cmd_args.shard_reset or (0 in shard_ids and not resumed):
+            backend.reset()
+        else:
+            backend.mark_busy(shard_ids)
+        backend.close()
+        with multiprocessing.Pool(len(shard_ids), maxtasksperchild=1) as pool:
+            pool.starmap(run_crawl, [([site_name],
+                                      shard_settings(SETTINGS, site_name, k, cmd_args.shards, backend_uri),
+                                      SPIDER_KWARGS, OVERRIDES) for k in shard_ids],
+                         chunksize=1)
+        n_merged = merge_shard_feeds(FILE_NAME, site_name, shard_ids, cmd_args.shards)
+        update_rollup(site_name, cmd_args.out_dir, SETTINGS['ROLLUP_DIR'], cmd_args.parquet_dir)
+        print('Merged {} articles of {} shards'.format(n_merged, len(shard_ids)))
+    elif n_procs <= 1:
+        run_crawl(site_names, SETTINGS, SPIDER_KWARGS, OVERRIDES)
+    else:
+        # Shard the sites across the processes, a reactor cannot be restarted
+        # so each process only runs one crawl
+        shards = [site_names[k::n_procs] for k in range(n_procs)]
+        with multiprocessing.Pool(n_procs, maxtasksperchild=1) as pool:
+            pool.starmap(run_crawl, [(shard, SETTINGS, SPIDER_KWARGS, OVERRIDES) for shard in shards],
+                         chunksize=1)
+    print('Done')
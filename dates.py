@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 18/10/2026 4:01 pm
+
+Extraction and parsing of the published dates of the articles
+"""
+# Standard library imports
+import re
+import json
+from functools import lru_cache
+from datetime import datetime, timedelta, timezone
+
+# Third party imports
+from lxml import etree
+
+
+# The articles are dated in Vietnam time, like START_DATE and END_DATE
+LOCAL_OFFSET = timedelta(hours=7)
+LOCAL_TZ = timezone(LOCAL_OFFSET)
+
+ISO_DATE = re.compile(r'(\d{4})-(\d{2})-(\d{2})(?:[T ](\d{2}):(\d{2})(?::(\d{2})(?:[.,](\d+))?)?)?'
+                      r'\s*(Z|[+-]\d{2}(?::?\d{2})?)?$')
+LD_JSON_DATE = re.compile(r'"datePublished"\s*:')
+LD_JSON_BLOCK_BYTES = re.compile(rb'<script[^>]*application/ld\+json[^>]*>(.*?)</script>', re.I | re.S)
+ARTICLE_TYPES = {'NewsArticle', 'Article', 'ReportageNewsArticle', 'AnalysisNewsArticle', 'BlogPosting'}
+META_CONTENT = re.compile(rb'content\s*=\s*["\']([^"\']*)["\']', re.I)
+
+# Regex of the strptime directives used by the sites
+DIRECTIVES = {'%Y': r'(?P<Y>\d{4})', '%m': r'(?P<m>\d{1,2})', '%d': r'(?P<d>\d{1,2})',
+              '%H': r'(?P<H>\d{1,2})', '%M': r'(?P<M>\d{1,2})', '%S': r'(?P<S>\d{1,2})',
+              '%z': r'(?P<z>Z|[+-]\d{2}:?\d{2})'}
+
+
+def to_local(art_date):
+    """
+    Convert a datetime to a naive Vietnam time, the naive ones being taken as
+    already in Vietnam time
+    """
+    if art_date.tzinfo is not None:
+        if art_date.utcoffset() != LOCAL_OFFSET:
+            art_date = art_date.astimezone(LOCAL_TZ)
+        art_date = art_date.replace(tzinfo=None)
+    return art_date
+
+
+@lru_cache(maxsize=64)
+def parse_offset(value):
+    if value is None:
+        return None
+    if value == 'Z':
+        return timezone.utc
+    sign = -1 if value[0] == '-' else 1
+    digits = value[1:].replace(':', '')
+    minutes = int(digits[:2]) * 60 + (int(digits[2:4]) if len(digits) > 2 else 0)
+    return timezone(sign * timedelta(minutes=minutes))
+
+
+def parse_iso(value):
+    """
+    Parse an ISO 8601 date with any number of fractional second digits and
+    an optional 'Z' or offset, the same way on every Python version
+    """
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        # Older Pythons only take 3 or 6 fractional digits and no 'Z'
+        pass
+    match = ISO_DATE.match(value)
+    if match is None:
+        raise ValueError('Invalid ISO date: {!r}'.format(value))
+    year, month, day, hour, minute, second, fraction, offset = match.groups()
+    microsecond = int(fraction[:6].ljust(6, '0')) if fraction else 0
+    return datetime(int(year), int(month), int(day), int(hour or 0), int(minute or 0),
+                    int(second or 0), microsecond, tzinfo=parse_offset(offset))
+
+
+@lru_cache(maxsize=None)
+def date_parser(fmt):
+    """
+    Parsing function of a date format of the site specs, built once per format
+    :param fmt: 'iso', 'iso_padded' or a strptime format
+    :return: function parsing a date string to a datetime
+    """
+    if fmt in ('iso', 'iso_padded'):
+        return parse_iso
+
+    # Translate the strptime format to a regex when it only has numeric directives
+    tokens = re.split(r'(%.)', fmt)
+    if any(token.startswith('%') and token not in DIRECTIVES for token in tokens):
+        return lambda value: datetime.strptime(value, fmt)
+    pattern = re.compile(''.join(DIRECTIVES[token] if token.startswith('%') else re.escape(token)
+                                 for token in tokens) + '$')
+
+    def parse(value):
+        match = pattern.match(value)
+        if match is None:
+            raise ValueError('Date {!r} does not match format {!r}'.format(value, fmt))
+        fields = match.groupdict()
+        return datetime(int(fields['Y']), int(fields['m']), int(fields['d']),
+                        int(fields.get('H') or 0), int(fields.get('M') or 0),
+                        int(fields.get('S') or 0), tzinfo=parse_offset(fields.get('z')))
+    return parse
+
+
+@lru_cache(maxsize=4096)
+def parse_date(value, fmt):
+    """
+    Parse a published date string with one of the formats of the site specs.
+    The results are memoised, a date being parsed again by the pre-parse
+    sniffing, the extraction and the listing pages.
+    :param value: the raw date string
+    :param fmt: 'iso', 'iso_padded' or a strptime format
+    :return: a naive datetime in Vietnam time
+    """
+    return to_local(date_parser(fmt)(value.strip()))
+
+
+def is_article(node):
+    if not isinstance(node, dict):
+        return False
+    types = node.get('@type')
+    if types is None:
+        return True
+    types = types if isinstance(types, list) else [types]
+    return any(t in ARTICLE_TYPES for t in types)
+
+
+def ld_json_date(scripts):
+    """
+    datePublished of the article described by the ld+json blocks: the
+    top-level object, or the article node of its @graph. The dates of the
+    nested objects (videos, reviews, isPartOf, ...) are ignored. Only the
+    blocks declaring a datePublished are decoded.
+    :param scripts: the texts of the ld+json blocks
+    :return: the raw date string, or None
+    """
+    for script in scripts:
+        if LD_JSON_DATE.search(script) is None:
+            continue
+        try:
+            data = json.loads(script)
+        except ValueError:
+            continue
+        nodes = data if isinstance(data, list) else [data]
+        if isinstance(data, dict) and isinstance(data.get('@graph'), list):
+            nodes = nodes + data['@graph']
+        for node in nodes:
+            if is_article(node) and isinstance(node.get('datePublished'), str):
+                return node['datePublished']
+    return None
+
+
+class DateExtractor:
+    """
+    Published date of the articles of a site, from its (source, format) spec:
+    the source is 'meta:<key>', 'ld+json' or an XPath, the format 'iso',
+    'iso_padded' or a strptime format. The date is read from the parsed page,
+    or from its raw bytes by the pre-parse sniffing.
+    """
+
+    def __init__(self, source, fmt):
+        self.source = source
+        self.fmt = fmt
+        self.xpath = etree.XPath(source) if source.startswith('/') else None
+        self.meta_key = source[5:] if source.startswith('meta:') else None
+        self.uses_ld_json = source == 'ld+json'
+        self.meta_bytes = None
+        if self.meta_key is not None:
+            self.meta_bytes = re.compile(rb'<meta\s[^>]*(?:name|property)\s*=\s*["\']' +
+                                         re.escape(self.meta_key.encode()) + rb'["\'][^>]*>', re.I)
+
+    def parse(self, raw):
+        """
+        :return: the naive Vietnam datetime, or None if raw is empty
+        """
+        if not raw:
+            return None
+        return parse_date(raw, self.fmt)
+
+    def from_tree(self, root, head_values, ld_json_scripts):
+        """
+        :param root: the lxml root of the page
+        :param head_values: the head values collected by SiteExtractor.scan_head
+        :param ld_json_scripts: the texts of the ld+json blocks of the page
+        :return: the naive Vietnam datetime, or None if the page has no date
+        """
+        if self.xpath is not None:
+            raw = self.xpath(root)
+            raw = raw[0] if raw else None
+            if isinstance(raw, etree._Element):
+                raw = raw.text
+        elif self.uses_ld_json:
+            raw = ld_json_date(ld_json_scripts)
+        else:
+            raw = head_values.get(self.meta_key)
+        return self.parse(raw)
+
+    def from_bytes(self, prefix):
+        """
+        Find the published date in the raw bytes of the page, without parsing it
+        :param prefix: the first bytes of the page
+        :return: the naive Vietnam datetime, or None if it cannot be found unambiguously
+        """
+        if self.meta_bytes is not None:
+            # The date meta is only read in the page head
+            head_end = prefix.find(b'</head>')
+            tag = self.meta_bytes.search(prefix, 0, head_end) if head_end >= 0 else None
+            content = META_CONTENT.search(tag.group()) if tag is not None else None
+            raw = content.group(1) if content is not None else None
+        elif self.uses_ld_json:
+            # Only the complete blocks of the prefix are decoded
+            blocks = LD_JSON_BLOCK_BYTES.findall(prefix)
+            raw = ld_json_date([block.decode('utf-8', 'replace') for block in blocks])
+            raw = raw.encode('utf-8') if raw is not None else None
+        else:
+            raw = None
+        if not raw:
+            return None
+        try:
+            return parse_date(raw.decode('utf-8'), self.fmt)
+        except (ValueError, UnicodeDecodeError):
+            return None
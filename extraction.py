@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 18/10/2026 9:12 am
+
+Compiled, table-driven extraction of the article fields used by the crawlers
+"""
+# Standard library imports
+import re
+
+# Third party imports
+from lxml import etree
+
+# Local application imports
+from dates import DateExtractor
+
+
+LD_JSON_XPATH = etree.XPath('//script[@type="application/ld+json"]/text()')
+SNIFF_BYTES = 256 * 1024
+
+
+class SiteExtractor:
+    """
+    Extract the published date, title, keywords and description of an article
+    page following the spec of a site, see SITE_SPECS in crawl_news.py.
+
+    Head fields are given as 'title' (the <title> text) or 'meta:<key>' (the
+    content of the <meta> whose name or property is <key>). They are all
+    collected in a single pass over the children of <head>. The other
+    selectors are XPath expressions compiled once per site.
+
+    The optional 'marker' of the spec is a regex matching the first
+    'sniff_bytes' bytes of every article page, e.g. the attribute selected by
+    'article'. With the date meta or ld+json, it rejects pages before they are
+    parsed, see sniff.
+    """
+
+    def __init__(self, name, spec):
+        self.name = name
+        self.article = etree.XPath(spec['article'])
+        self.min_url_parts = spec.get('min_url_parts', 0)
+        self.min_ld_json = spec.get('min_ld_json', 0)
+
+        # Set the date source and format, see dates.py
+        self.date = DateExtractor(*spec['date'])
+
+        # Set the head fields to be collected
+        self.fields = {'title': spec.get('title', 'title'),
+                       'keywords': spec.get('keywords', 'meta:news_keywords'),
+                       'description': spec.get('description', 'meta:description')}
+        self.meta_keys = {source[5:] for source in self.fields.values()
+                          if source.startswith('meta:')}
+        if self.date.meta_key is not None:
+            self.meta_keys.add(self.date.meta_key)
+        self.use_ld_json = self.date.uses_ld_json or self.min_ld_json > 0
+
+        # Set the byte patterns of the pre-parse sniffing
+        self.marker = re.compile(spec['marker'].encode()) if 'marker' in spec else None
+        self.sniff_bytes = spec.get('sniff_bytes', SNIFF_BYTES)
+
+    def is_article(self, root, url):
+        if self.min_url_parts and len(url.split('/')) < self.min_url_parts:
+            return False
+        return bool(self.article(root))
+
+    def sniff(self, body, start, end):
+        """
+        Reject the page from its raw bytes, before any tree is built
+        :param body: the page bytes
+        :param start, end: the period of interest, end may be None
+        :return: (reason, published date) where reason is 'not_article' or
+                 'out_of_window' if the page is rejected, None if it has to be
+                 parsed, and the date is None unless it was found
+        """
+        prefix = body[:self.sniff_bytes]
+        if self.marker is not None and self.marker.search(prefix) is None:
+            return 'not_article', None
+        art_date = self.date.from_bytes(prefix)
+        if art_date is not None and (art_date < start or (end is not None and art_date >= end)):
+            return 'out_of_window', art_date
+        return None, art_date
+
+    def scan_head(self, root):
+        """
+        Collect the <title> text and the wanted <meta> contents in one pass
+        :param root: the lxml root of the page
+        :return: dictionary of {'title': ..., '<meta key>': ...}
+        """
+        values = {}
+        head = root.find('head')
+        elements = head.iterchildren() if head is not None else root.iter('title', 'meta')
+        for el in elements:
+            tag = el.tag
+            if tag == 'meta':
+                key = el.get('name') or el.get('property')
+                if key in self.meta_keys and key not in values:
+                    values[key] = el.get('content')
+            elif tag == 'title' and 'title' not in values:
+                values['title'] = el.text or ''
+        return values
+
+    def extract(self, root, url):
+        """
+        Extract the fields of an article page
+        :param root: the lxml root of the page
+        :param url: the url of the page
+        :return: None if the page is not an article, otherwise a dictionary
+                 with the keys 'published_datetime', 'title', 'keywords' and
+                 'description' ('published_datetime' is None if the published
+                 date could not be found)
+        """
+        if not self.is_article(root, url):
+            return None
+
+        ld_json_scripts = LD_JSON_XPATH(root) if self.use_ld_json else []
+        if len(ld_json_scripts) < self.min_ld_json:
+            return None
+
+        head_values = self.scan_head(root)
+        art = {'published_datetime': self.date.from_tree(root, head_values, ld_json_scripts)}
+        for field, source in self.fields.items():
+            key = 'title' if source == 'title' else source[5:]
+            art[field] = head_values.get(key) or ''
+        return art
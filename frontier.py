@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 18/10/2026 3:41 pm
+
+Date-window-aware policy for the crawl frontier
+"""
+# Standard library imports
+import re
+from datetime import timedelta
+from collections import OrderedDict
+
+
+# Pagination of a section listing, e.g. '/thoi-su-p2', '/xa-hoi/trang2.html',
+# '/page/3/' or '?page=3'
+PAGINATION_PATTERN = re.compile(r'[/-](?:trang|page|p)[-/]?\d+(?=(?:\.html?|\.chn|\.ldo)?/?$)'
+                                r'|[?&](?:page|p|trang)=\d+')
+
+
+class ListingPage:
+    __slots__ = ['n_dates', 'newest']
+
+    def __init__(self):
+        self.n_dates = 0
+        self.newest = None
+
+
+class DateWindowFrontier:
+    """
+    Follow the publish dates seen on each chain of section listing pages.
+
+    A chain is a section listing and its pagination, keyed by the listing url
+    without the page number. Every article linked from a listing page adds
+    its date (estimated from the url, or extracted once fetched) to that page.
+    Once a page of a chain has at least min_dates dates, all of them before
+    the window, the chain is past the window and its pagination is no longer
+    followed. Listings are sorted newest first, so the later pages are older.
+
+    A page is forgotten once its chain is exhausted, and at most max_pages
+    pages are tracked, the least recently observed being dropped first, so
+    the article pages linking to other articles do not pile up.
+    """
+
+    def __init__(self, start_date, end_date, pagination_pattern=None,
+                 min_dates=5, slack=timedelta(days=7), max_pages=10000):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.pagination = re.compile(pagination_pattern) if pagination_pattern \
+            else PAGINATION_PATTERN
+        self.min_dates = min_dates
+        self.slack = slack
+        self.max_pages = max_pages
+        self.pages = OrderedDict()
+        self.exhausted = set()
+
+    def chain_key(self, url):
+        return self.pagination.sub('', url).rstrip('/')
+
+    def is_pagination(self, url, source_url):
+        # Check if the url is another page of the listing of source_url
+        return url != source_url and self.pagination.search(url) is not None and \
+            self.chain_key(url) == self.chain_key(source_url)
+
+    def observe(self, source_url, art_date):
+        """
+        Record the date of an article linked from the listing page source_url
+        """
+        key = self.chain_key(source_url)
+        if key in self.exhausted:
+            return
+        page = self.pages.get(source_url)
+        if page is None:
+            page = self.pages[source_url] = ListingPage()
+            if len(self.pages) > self.max_pages:
+                self.pages.popitem(last=False)
+        else:
+            self.pages.move_to_end(source_url)
+        page.n_dates += 1
+        if page.newest is None or art_date > page.newest:
+            page.newest = art_date
+        if page.n_dates >= self.min_dates and \
+                page.newest + self.slack < self.start_date:
+            self.exhausted.add(key)
+            del self.pages[source_url]
+
+    def follow(self, url, source_url):
+        """
+        Check if the link url found on source_url should still be followed
+        """
+        return not (self.is_pagination(url, source_url) and
+                    self.chain_key(source_url) in self.exhausted)
+
+    def priority(self, est_date):
+        """
+        Priority of a request by how close its estimated date is to the window:
+        2 within the window, then 1 less per 30 days away, down to -10
+        """
+        if est_date is None:
+            return 0
+        if est_date < self.start_date:
+            distance = self.start_date - est_date
+        elif self.end_date is not None and est_date >= self.end_date:
+            distance = est_date - self.end_date
+        else:
+            return 2
+        return max(1 - distance.days // 30, -10)
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 18/10/2026 3:49 pm
+
+Record-and-replay archive of the fetched responses, for offline crawls
+"""
+# Standard library imports
+import os
+import json
+import zlib
+import sqlite3
+from datetime import datetime
+
+# Third party imports
+from scrapy import signals
+from scrapy.http import Request, Headers
+from scrapy.responsetypes import responsetypes
+from scrapy.exceptions import IgnoreRequest, NotConfigured
+
+
+class HttpArchive:
+    """
+    SQLite archive of responses keyed by request fingerprint, with the body
+    zlib-compressed. The writes are committed every commit_every responses,
+    every response when several processes record to the archive.
+    """
+
+    def __init__(self, file_name, commit_every=100):
+        # The workers of a sharded crawl share the archive of the site
+        self.conn = sqlite3.connect(file_name, timeout=60)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS responses ('
+                          'fingerprint TEXT PRIMARY KEY, url TEXT, status INTEGER, '
+                          'headers TEXT, body BLOB, fetched_at TEXT)')
+        self.commit_every = commit_every
+        self.n_uncommitted = 0
+
+    def __len__(self):
+        return self.conn.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+
+    def put(self, fingerprint, url, status, headers, body):
+        headers = json.dumps([(k.decode('latin-1'), [v.decode('latin-1') for v in values])
+                              for k, values in headers.items()])
+        self.conn.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)',
+                          (fingerprint, url, status, headers, zlib.compress(body),
+                           datetime.now().isoformat(timespec='seconds')))
+        self.n_uncommitted += 1
+        if self.n_uncommitted >= self.commit_every:
+            self.commit()
+
+    def get(self, fingerprint):
+        """
+        :return: (url, status, headers, body), or None if the request was not recorded
+        """
+        row = self.conn.execute('SELECT url, status, headers, body FROM responses '
+                                'WHERE fingerprint = ?', (fingerprint,)).fetchone()
+        if row is None:
+            return None
+        url, status, headers, body = row
+        return url, status, Headers(json.loads(headers)), zlib.decompress(body)
+
+    def commit(self):
+        self.conn.commit()
+        self.n_uncommitted = 0
+
+    def close(self):
+        self.commit()
+        self.conn.close()
+
+
+class HttpArchiveMiddleware:
+    """
+    Record every fetched response to <HTTP_ARCHIVE>/<site>.sqlite when
+    HTTP_ARCHIVE_MODE is 'record', or serve the requests from that archive
+    with no network when it is 'replay' (requests not recorded are dropped)
+    """
+
+    def __init__(self, crawler, directory, mode):
+        self.crawler = crawler
+        self.directory = directory
+        self.mode = mode
+        self.archive = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        directory = crawler.settings.get('HTTP_ARCHIVE')
+        mode = crawler.settings.get('HTTP_ARCHIVE_MODE', 'record')
+        if not directory:
+            raise NotConfigured
+        if mode not in ('record', 'replay'):
+            raise ValueError('HTTP_ARCHIVE_MODE must be record or replay, not {}'.format(mode))
+        mw = cls(crawler, directory, mode)
+        crawler.signals.connect(mw.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(mw.spider_closed, signal=signals.spider_closed)
+        return mw
+
+    def spider_opened(self, spider):
+        os.makedirs(self.directory, exist_ok=True)
+        self.archive = HttpArchive(os.path.join(self.directory, '{}.sqlite'.format(spider.name)),
+                                   self.crawler.settings.getint('HTTP_ARCHIVE_COMMIT_EVERY', 100))
+
+    def spider_closed(self, spider):
+        self.archive.close()
+
+    def fingerprint(self, request):
+        return self.crawler.request_fingerprinter.fingerprint(request).hex()
+
+    def process_request(self, request):
+        if self.mode != 'replay':
+            return None
+        cached = self.archive.get(self.fingerprint(request))
+        if cached is None:
+            self.crawler.stats.inc_value('archive/miss')
+            raise IgnoreRequest('Not in the archive: {}'.format(request.url))
+        self.crawler.stats.inc_value('archive/hit')
+        url, status, headers, body = cached
+        respcls = responsetypes.from_args(headers=headers, url=url, body=body)
+        return respcls(url=url, status=status, headers=headers, body=body,
+                       request=request, flags=['archived'])
+
+    def process_response(self, request, response):
+        if self.mode != 'record' or 'archived' in response.flags:
+            return response
+        # Also store the response under the urls redirected to it
+        urls = [request.url] + request.meta.get('redirect_urls', [])
+        for k, url in enumerate(urls):
+            req = request if k == 0 else Request(url)
+            self.archive.put(self.fingerprint(req), response.url, response.status,
+                             response.headers, response.body)
+        self.crawler.stats.inc_value('archive/recorded')
+        return response
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 18/10/2026 3:48 pm
+
+Streaming reader of the crawled jsonlines files, yielding only the requested fields
+"""
+# Standard library imports
+import os
+import json
+import mmap
+
+# Third party imports
+try:
+    import orjson
+    loads = orjson.loads
+except ImportError:
+    loads = json.loads
+
+
+def iter_records(file_name, fields=('date', 'url'), offset=0):
+    """
+    Stream the records of a jsonlines file through a memory map, from the
+    byte offset on. Only complete lines are read, so a file being written can
+    be read again later from the last returned offset.
+    :return: generator of (offset after the line, tuple of the field values)
+    """
+    with open(file_name, 'rb') as f:
+        if os.fstat(f.fileno()).st_size <= offset:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            pos = offset
+            while True:
+                end = mm.find(b'\n', pos)
+                if end < 0:
+                    break
+                line = mm[pos:end]
+                pos = end + 1
+                if line.strip():
+                    item = loads(line)
+                    yield pos, tuple(item.get(field) for field in fields)
+
+
+def update_from_jsonl(conn, file_name, fields, add):
+    """
+    Read the records written to a crawled jsonlines file since the last
+    update of a SQLite index, whose sources table keeps the read offset, size
+    and modification time of each file. A file rewritten from scratch is read
+    again from its start.
+    :param conn: the connection of the index, committed after the update
+    :param add: function called with the field values of each new record
+    :return: number of records read
+    """
+    if not os.path.exists(file_name):
+        return 0
+    conn.execute('CREATE TABLE IF NOT EXISTS sources (file TEXT PRIMARY KEY, offset INTEGER, '
+                 'size INTEGER, mtime REAL)')
+    file_name = os.path.normpath(file_name)
+    stat = os.stat(file_name)
+    row = conn.execute('SELECT offset, size, mtime FROM sources WHERE file = ?', (file_name,)).fetchone()
+    offset = 0
+    if row is not None:
+        offset, size, mtime = row
+        if stat.st_size < offset:
+            offset = 0
+        elif stat.st_size == offset and stat.st_mtime == mtime:
+            return 0
+
+    n_read = 0
+    for offset, values in iter_records(file_name, fields, offset):
+        add(*values)
+        n_read += 1
+    conn.execute('INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?)',
+                 (file_name, offset, stat.st_size, stat.st_mtime))
+    conn.commit()
+    return n_read
+
+
+def iter_fields(file_name, fields=('date', 'url')):
+    """
+    Stream the requested fields of the records of a jsonlines file
+    :return: generator of tuples of the field values
+    """
+    for _, values in iter_records(file_name, fields):
+        yield values
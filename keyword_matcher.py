@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 18/10/2026 10:05 am
+
+Single-pass matching of a keyword list with Vietnamese diacritic folding
+"""
+# Standard library imports
+import re
+import unicodedata
+
+
+def build_fold_table():
+    """
+    Build the str.translate table mapping every Latin letter with diacritics
+    to its lowercase NFKD base letter, and dropping the combining marks
+    """
+    table = {ord('đ'): 'd', ord('Đ'): 'd'}
+    for code in range(0x0300, 0x0370):
+        table[code] = None
+    for code in list(range(0x00C0, 0x0250)) + list(range(0x1E00, 0x1F00)):
+        char = chr(code)
+        base = ''.join(c for c in unicodedata.normalize('NFKD', char)
+                       if not unicodedata.combining(c)).lower()
+        if base != char:
+            table.setdefault(code, base)
+    return table
+
+
+FOLD_TABLE = build_fold_table()
+WORD = re.compile(r'\w+')
+
+
+def fold_diacritics(text):
+    """
+    Lowercase the text and strip the Vietnamese diacritics,
+    e.g. 'Viêm phổi Đà Nẵng' -> 'viem phoi da nang'
+    """
+    text = text.lower()
+    if text.isascii():
+        return text
+    return text.translate(FOLD_TABLE)
+
+
+def tokenize(text):
+    """
+    Diacritic-folded words of the text, e.g. 'Viêm phổi' -> ['viem', 'phoi']
+    """
+    return WORD.findall(fold_diacritics(text or ''))
+
+
+def trie_pattern(terms):
+    """
+    Build a regular expression matching any of the terms, with the common
+    prefixes factored out so the scan only branches on the next character
+    """
+    trie = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def to_pattern(node):
+        ends = '' in node
+        branches = [re.escape(char) + to_pattern(child)
+                    for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        if len(branches) == 1 and not ends:
+            return branches[0]
+        pattern = '(?:{})'.format('|'.join(branches))
+        # Prefer the longest term, fall back to the term ending here
+        return pattern + '?' if ends else pattern
+
+    return to_pattern(trie)
+
+
+class KeywordMatcher:
+    """
+    Match all the keywords in one linear pass over the folded text.
+
+    The folded keywords are compiled once into a single trie-shaped
+    alternation. A zero-width lookahead lets the scan report the longest
+    match at every position, and the terms contained in a matched term are
+    reported with it, so find_terms() returns every keyword in the text.
+    """
+
+    def __init__(self, keywords):
+        self.keywords = list(keywords)
+
+        # Map each folded term to the original keywords, a blank keyword
+        # would match every text
+        self.terms = {}
+        for kw in self.keywords:
+            term = fold_diacritics(kw)
+            if term.strip():
+                self.terms.setdefault(term, []).append(kw)
+        # With no terms, the pattern never matches
+        self.pattern = re.compile(trie_pattern(self.terms) if self.terms else '(?!)')
+        self.overlapping = re.compile('(?=({}))'.format(self.pattern.pattern))
+
+        # Set the terms implied by a match of a longer term
+        self.implied = {term: [t for t in self.terms if t in term] for term in self.terms}
+
+    def search(self, text):
+        """
+        Check if any keyword is in the text
+        """
+        return self.pattern.search(fold_diacritics(text)) is not None
+
+    def find_terms(self, text):
+        """
+        Find the keywords occurring in the text
+        :return: set of the original keywords that hit
+        """
+        hits = set()
+        for match in self.overlapping.finditer(fold_diacritics(text)):
+            for term in self.implied[match.group(1)]:
+                hits.update(self.terms[term])
+        return hits
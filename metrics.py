@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 18/10/2026 3:54 pm
+
+Per-site crawl metrics, exported periodically as Prometheus text or JSON
+"""
+# Standard library imports
+import os
+import json
+import bisect
+
+# Third party imports
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from twisted.internet.task import LoopingCall
+
+
+# Upper bounds of the latency buckets, in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1., 2.5, 5., 10., 30.)
+
+# Crawl stats exported as counters: stats key prefix -> (metric name, label)
+COUNTERS = {'response_received_count': ('pages_fetched', None),
+            'articles/pages': ('article_pages', None),
+            'articles/in_window': ('in_window_articles', None),
+            'articles/keyword_hits': ('keyword_hits', None),
+            'item_scraped_count': ('items_scraped', None),
+            'extraction/failed/': ('extraction_failures', 'field'),
+            'sniff/rejected/': ('sniff_rejections', 'reason'),
+            'sniff/saved_parses': ('saved_parses', None),
+            'links/extracted': ('links_extracted', None),
+            'links/kept': ('links_kept', None),
+            'scheduler/spilled': ('spilled_requests', None),
+            'revalidation/requests': ('conditional_requests', None),
+            'revalidation/hits': ('not_modified', None),
+            'downloader/response_status_count/': ('responses', 'status')}
+
+
+class Histogram:
+    """
+    Latency histogram with fixed buckets, cumulative like the Prometheus ones
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.
+        self.n = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.n += 1
+
+    def quantile(self, q):
+        """
+        Upper bound of the bucket holding the q quantile
+        """
+        if not self.n:
+            return None
+        rank = q * self.n
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return bound
+        return float('inf')
+
+    def to_dict(self):
+        return {'count': self.n, 'sum': self.total,
+                'p50': self.quantile(0.5), 'p95': self.quantile(0.95),
+                'buckets': dict(zip([str(b) for b in self.buckets] + ['+Inf'], self.counts))}
+
+
+class CrawlMetrics:
+    """
+    Extension keeping the latency histograms of a site and exporting them with
+    its counters and frontier size every METRICS_INTERVAL seconds to
+    METRICS_FILE, e.g. 'data/metrics/%(name)s.prom'. The file is written in
+    the Prometheus text format, or in JSON when its name ends with '.json'.
+
+    The counters are read from the crawl stats, see COUNTERS. The extension is
+    attached to the spider as spider.metrics so the spider can record the
+    parse times.
+    """
+
+    def __init__(self, crawler, file_name, interval):
+        self.crawler = crawler
+        self.file_name = file_name
+        self.interval = interval
+        self.histograms = {'download_seconds': Histogram(), 'parse_seconds': Histogram()}
+        self.site_name = None
+        self.task = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        file_name = crawler.settings.get('METRICS_FILE')
+        if not file_name:
+            raise NotConfigured
+        ext = cls(crawler, file_name, crawler.settings.getfloat('METRICS_INTERVAL', 30.))
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        crawler.signals.connect(ext.response_received, signal=signals.response_received)
+        return ext
+
+    def spider_opened(self, spider):
+        self.site_name = spider.name
+        self.file_name = self.file_name % {'name': spider.name}
+        if os.path.dirname(self.file_name):
+            os.makedirs(os.path.dirname(self.file_name), exist_ok=True)
+        spider.metrics = self
+        self.task = LoopingCall(self.export)
+        self.task.start(self.interval, now=False)
+
+    def spider_closed(self, spider):
+        if self.task is not None and self.task.running:
+            self.task.stop()
+        self.export()
+
+    def response_received(self, response, request, spider):
+        if 'download_latency' in request.meta:
+            self.observe('download_seconds', request.meta['download_latency'])
+
+    def observe(self, name, value):
+        self.histograms[name].observe(value)
+
+    def frontier_size(self):
+        engine = self.crawler.engine
+        scheduler = getattr(engine, 'scheduler', None) if engine is not None else None
+        return len(scheduler) if scheduler is not None else 0
+
+    def counters(self):
+        """
+        :return: list of (metric name, label name, label value, value)
+        """
+        counters = []
+        for key, value in self.crawler.stats.get_stats().items():
+            for prefix, (name, label) in COUNTERS.items():
+                if label is None and key == prefix:
+                    counters.append((name, None, None, value))
+                elif label is not None and key.startswith(prefix):
+                    counters.append((name, label, key[len(prefix):], value))
+        return sorted(counters)
+
+    def to_dict(self):
+        counters = {}
+        for name, label, label_value, value in self.counters():
+            if label is None:
+                counters[name] = value
+            else:
+                counters.setdefault(name, {})[label_value] = value
+        return {'site': self.site_name, 'counters': counters,
+                'frontier_size': self.frontier_size(),
+                'histograms': {name: hist.to_dict() for name, hist in self.histograms.items()}}
+
+    def to_prometheus(self):
+        site = 'site="{}"'.format(self.site_name)
+        lines = []
+        for name, label, label_value, value in self.counters():
+            labels = site if label is None else '{},{}="{}"'.format(site, label, label_value)
+            lines.append('crawl_{}_total{{{}}} {}'.format(name, labels, value))
+        lines.append('crawl_frontier_size{{{}}} {}'.format(site, self.frontier_size()))
+        for name, hist in self.histograms.items():
+            cumulative = 0
+            for bound, count in zip([str(b) for b in hist.buckets] + ['+Inf'], hist.counts):
+                cumulative += count
+                lines.append('crawl_{}_bucket{{{},le="{}"}} {}'.format(name, site, bound, cumulative))
+            lines.append('crawl_{}_sum{{{}}} {}'.format(name, site, hist.total))
+            lines.append('crawl_{}_count{{{}}} {}'.format(name, site, hist.n))
+        return '\n'.join(lines) + '\n'
+
+    def export(self):
+        # Write to a temporary file first so the readers never see a partial file
+        text = json.dumps(self.to_dict(), indent=2) if self.file_name.endswith('.json') \
+            else self.to_prometheus()
+        with open(self.file_name + '.tmp', 'w') as f:
+            f.write(text)
+        os.replace(self.file_name + '.tmp', self.file_name)
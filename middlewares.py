@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 18/10/2026 3:43 pm
+
+Downloader middlewares of the crawlers
+"""
+
+# Third party imports
+from scrapy import signals
+from scrapy.exceptions import IgnoreRequest, NotConfigured
+
+# Local application imports
+from seen_store import SeenUrlStore
+
+
+class SeenUrlMiddleware:
+    """
+    Skip the article urls crawled by the previous runs, before fetching them.
+
+    The store of a site is opened in the SEEN_DIR setting, seeded from the
+    site's crawled jsonlines file (SEEN_SEED_URI, defaulting to FEED_URI),
+    and attached to the spider as spider.seen_store so the spider and
+    SeenUrlPipeline can update it.
+    """
+
+    def __init__(self, seen_dir, feed_uri, stats):
+        self.seen_dir = seen_dir
+        self.feed_uri = feed_uri
+        self.stats = stats
+        self.store = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        seen_dir = crawler.settings.get('SEEN_DIR')
+        if not seen_dir:
+            raise NotConfigured
+        mw = cls(seen_dir, crawler.settings.get('SEEN_SEED_URI') or crawler.settings.get('FEED_URI'),
+                 crawler.stats)
+        crawler.signals.connect(mw.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(mw.spider_closed, signal=signals.spider_closed)
+        return mw
+
+    def spider_opened(self, spider):
+        self.store = SeenUrlStore(self.seen_dir, spider.name)
+        if self.feed_uri:
+            n_added = self.store.seed_from_jsonl(self.feed_uri % {'name': spider.name})
+            self.stats.set_value('seen/seeded', n_added)
+        self.stats.set_value('seen/size', len(self.store))
+        spider.seen_store = self.store
+
+    def spider_closed(self, spider):
+        self.stats.set_value('seen/size', len(self.store))
+        self.store.close()
+
+    def process_request(self, request):
+        if self.store is not None and request.url in self.store:
+            self.stats.inc_value('seen/skipped')
+            raise IgnoreRequest('Already crawled: {}'.format(request.url))
+        return None
@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 18/10/2026 4:03 pm
+
+Cross-site near-duplicate detection of the crawled articles with MinHash
+signatures and an on-disk locality-sensitive hashing index
+"""
+# Standard library imports
+import os
+import re
+import zlib
+import sqlite3
+import argparse
+from datetime import date, timedelta
+from hashlib import blake2b
+
+# Third party imports
+import numpy as np
+
+# Local application imports
+from keyword_matcher import tokenize
+from jsonl_reader import update_from_jsonl
+
+
+TITLE_SUFFIX = re.compile(r'\s+[-|]\s+.*$')
+PRIME = (1 << 32) + 15
+N_PERM = 64
+N_BANDS = 16
+SEED = 20201117
+
+
+def story_text(title, description):
+    """
+    Text compared between the articles: the title without the section and site
+    name suffix (e.g. ' - Sức khỏe - ZINGNEWS.VN') and the description
+    """
+    return '{} {}'.format(TITLE_SUFFIX.sub('', title or ''), description or '')
+
+
+def shingles(text, k=2):
+    """
+    Hashes of the word k-grams of the diacritic-folded text
+    :return: uint64 numpy array, empty if the text has no words
+    """
+    words = tokenize(text)
+    if len(words) < k:
+        grams = [' '.join(words)] if words else []
+    else:
+        grams = [' '.join(words[i:i + k]) for i in range(len(words) - k + 1)]
+    return np.fromiter((zlib.crc32(gram.encode()) for gram in set(grams)), dtype=np.uint64)
+
+
+class MinHasher:
+    """
+    MinHash signatures of N_PERM universal hash functions (a * x + b) mod PRIME
+    of the 32-bit shingle hashes, the same for every run. The product of a
+    and x, both 32-bit, would overflow 64 bits, so x is split into 16-bit
+    halves and each partial product is reduced modulo PRIME.
+    """
+
+    def __init__(self, n_perm=N_PERM, seed=SEED):
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, 1 << 32, n_perm, dtype=np.uint64)[:, None]
+        self.b = rng.integers(0, 1 << 32, n_perm, dtype=np.uint64)[:, None]
+
+    def signature(self, hashes):
+        """
+        :param hashes: uint64 numpy array of shingle hashes, not empty
+        :return: uint32 numpy array of length n_perm
+        """
+        high, low = hashes[None, :] >> np.uint64(16), hashes[None, :] & np.uint64(0xFFFF)
+        products = ((self.a * high) % PRIME << np.uint64(16)) % PRIME
+        return ((products + self.a * low + self.b) % PRIME).min(axis=1).astype(np.uint32)
+
+
+def band_keys(signature, n_bands=N_BANDS):
+    """
+    One 64-bit key per band of rows of the signature, two items sharing a key
+    being candidate near-duplicates
+    """
+    return [int.from_bytes(blake2b(band.tobytes(), digest_size=8).digest(), 'little', signed=True)
+            for band in np.split(signature, n_bands)]
+
+
+class StoryIndex:
+    """
+    SQLite index grouping the near-duplicate articles of all the sites into
+    stories. Each article is stored with its MinHash signature and the keys
+    of its LSH bands; the candidates of a new article are the ones sharing a
+    band key, found through the index on (band, key) without scanning the
+    articles. A candidate published within max_days whose estimated Jaccard
+    similarity is at least threshold makes the new article join its story,
+    otherwise the article starts a new story.
+
+    The read offset of each jsonlines file is kept too, so updating the
+    index only reads the lines written since the last update.
+    """
+
+    def __init__(self, file_name, threshold=0.6, max_days=7):
+        if os.path.dirname(file_name):
+            os.makedirs(os.path.dirname(file_name), exist_ok=True)
+        self.conn = sqlite3.connect(file_name)
+        self.conn.executescript(
+            'CREATE TABLE IF NOT EXISTS articles (id INTEGER PRIMARY KEY, url TEXT UNIQUE, '
+            'site TEXT, date TEXT, story INTEGER, signature BLOB);'
+            'CREATE TABLE IF NOT EXISTS bands (band INTEGER, key INTEGER, article INTEGER);'
+            'CREATE INDEX IF NOT EXISTS bands_key ON bands (band, key);')
+        self.hasher = MinHasher()
+        self.threshold = threshold
+        self.max_days = timedelta(days=max_days)
+
+    def __len__(self):
+        return self.conn.execute('SELECT COUNT(*) FROM articles').fetchone()[0]
+
+    def n_stories(self):
+        return self.conn.execute('SELECT COUNT(DISTINCT story) FROM articles').fetchone()[0]
+
+    def find_story(self, signature, keys, art_date):
+        """
+        :return: the story of the most similar candidate, or None
+        """
+        candidates = set()
+        for band, key in enumerate(keys):
+            candidates.update(row[0] for row in self.conn.execute(
+                'SELECT article FROM bands WHERE band = ? AND key = ?', (band, key)))
+        best, best_similarity = None, self.threshold
+        for article_id in candidates:
+            cand_date, story, cand_signature = self.conn.execute(
+                'SELECT date, story, signature FROM articles WHERE id = ?', (article_id,)).fetchone()
+            if abs(date.fromisoformat(cand_date) - art_date) > self.max_days:
+                continue
+            similarity = np.mean(np.frombuffer(cand_signature, dtype=np.uint32) == signature)
+            if similarity >= best_similarity:
+                best, best_similarity = story, similarity
+        return best
+
+    def add(self, url, site_name, art_date, text):
+        """
+        Add an article if its url is new
+        :param art_date: the published date, 'YYYY-MM-DD'
+        :param text: the text compared, e.g. the title and the description
+        :return: the story id of the article, None if the url was already indexed
+        """
+        if self.conn.execute('SELECT 1 FROM articles WHERE url = ?', (url,)).fetchone():
+            return None
+        hashes = shingles(text)
+        signature = self.hasher.signature(hashes) if len(hashes) else None
+        keys = band_keys(signature) if signature is not None else []
+        story = self.find_story(signature, keys, date.fromisoformat(art_date)) if keys else None
+
+        cursor = self.conn.execute(
+            'INSERT INTO articles (url, site, date, story, signature) VALUES (?, ?, ?, ?, ?)',
+            (url, site_name, art_date, story,
+             signature.tobytes() if signature is not None else None))
+        article_id = cursor.lastrowid
+        if story is None:
+            story = article_id
+            self.conn.execute('UPDATE articles SET story = ? WHERE id = ?', (story, article_id))
+        self.conn.executemany('INSERT INTO bands VALUES (?, ?, ?)',
+                              [(band, key, article_id) for band, key in enumerate(keys)])
+        return story
+
+    def update_from_jsonl(self, file_name, site_name):
+        """
+        Index the articles written to a crawled jsonlines file since the last update
+        :return: number of articles read
+        """
+        return update_from_jsonl(
+            self.conn, file_name, ('url', 'date', 'title', 'description'),
+            lambda url, art_date, title, description: self.add(url, site_name, art_date,
+                                                               story_text(title, description)))
+
+    def story_dates(self, sites=None):
+        """
+        Date of the first article of each story
+        :param sites: only count the stories with an article of these sites
+        :return: numpy datetime64[D] array
+        """
+        query = 'SELECT MIN(date) FROM articles GROUP BY story'
+        params = ()
+        if sites is not None:
+            query = ('SELECT MIN(date) FROM articles WHERE story IN (SELECT story FROM articles '
+                     'WHERE site IN ({})) GROUP BY story'.format(','.join('?' * len(sites))))
+            params = tuple(sites)
+        return np.array([row[0] for row in self.conn.execute(query, params)], dtype='datetime64[D]')
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+
+def update_index(site_names, data_dir='data', index_file='data/stories.sqlite'):
+    """
+    Update the story index from the jsonlines files of the sites
+    :return: the StoryIndex
+    """
+    index = StoryIndex(index_file)
+    for site_name in site_names:
+        index.update_from_jsonl(os.path.join(data_dir, '{}.jsonl'.format(site_name)), site_name)
+    return index
+
+
+def load_story_dates(site_names, index_file='data/stories.sqlite'):
+    """
+    Load the dates of the unique stories of the sites, the near-duplicate
+    articles published by several sites counting once on their first date.
+    The story index is built and updated by update_index.
+    :return: numpy datetime64[D] array, one date per story, or None if the
+             story index has not been built
+    """
+    if not os.path.exists(index_file):
+        return None
+    index = StoryIndex(index_file)
+    dates = index.story_dates(site_names)
+    index.close()
+    return dates
+
+
+# ------------------------------------------------------------------------------
+# Main function
+# ------------------------------------------------------------------------------
+if __name__ == '__main__':
+    args = argparse.ArgumentParser(description='Cross-site near-duplicate detection')
+    args.add_argument('--data_dir', default='data', type=str,
+                      help='Directory of the crawled jsonlines files')
+    args.add_argument('--index_file', default='data/stories.sqlite', type=str,
+                      help='SQLite file of the story index')
+    args.add_argument('--sites', default=None, type=str,
+                      help='Comma-separated names of the online newspapers, '
+                           'defaults to all the jsonlines files of data_dir')
+    cmd_args = args.parse_args()
+
+    site_names = cmd_args.sites.split(',') if cmd_args.sites else \
+        sorted(f[:-6] for f in os.listdir(cmd_args.data_dir) if f.endswith('.jsonl'))
+    index = update_index(site_names, cmd_args.data_dir, cmd_args.index_file)
+    print(f'{len(index)} articles, {index.n_stories()} unique stories')
+    for site_name, n_articles, n_stories in index.conn.execute(
+            'SELECT site, COUNT(*), COUNT(DISTINCT story) FROM articles GROUP BY site'):
+        print(f'  {site_name:<11s} {n_articles:8d} articles {n_stories:8d} stories')
+    index.close()
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 18/10/2026 3:44 pm
+
+Item pipelines of the crawlers
+"""
+# Third party imports
+from scrapy.exceptions import DropItem
+
+# Local application imports
+from urls import canonicalize_url
+from seen_store import FingerprintSet, url_fingerprint
+from rollups import DailyRollup
+
+
+class DeduplicationPipeline:
+    """
+    Write the items with their canonical url, dropping the articles already
+    written in this run (e.g. reached through links with different query
+    strings, fragments or the mobile host)
+    """
+
+    def __init__(self, crawler):
+        self.crawler = crawler
+        self.fingerprints = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler)
+
+    def open_spider(self):
+        self.fingerprints = FingerprintSet()
+
+    def process_item(self, item):
+        item['url'] = canonicalize_url(item['url'])
+        if not self.fingerprints.add(url_fingerprint(item['url'])):
+            self.crawler.stats.inc_value('dedup/dropped')
+            raise DropItem('Duplicate article: {}'.format(item['url']))
+        return item
+
+
+class SeenUrlPipeline:
+    """
+    Add the url of every written item to the seen-url store of the spider,
+    see SeenUrlMiddleware
+    """
+
+    def __init__(self, crawler):
+        self.crawler = crawler
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler)
+
+    def process_item(self, item):
+        store = getattr(self.crawler.spider, 'seen_store', None)
+        if store is not None:
+            store.add(item['url'])
+        return item
+
+
+class RollupPipeline:
+    """
+    Maintain the per-day counts of the site in the ROLLUP_DIR setting as the
+    items are emitted, see rollups.py
+    """
+
+    def __init__(self, crawler, rollup_dir):
+        self.crawler = crawler
+        self.rollup_dir = rollup_dir
+        self.rollup = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler, crawler.settings.get('ROLLUP_DIR'))
+
+    def open_spider(self):
+        self.rollup = DailyRollup(self.rollup_dir, self.crawler.spider.name)
+
+    def close_spider(self):
+        self.rollup.save()
+
+    def process_item(self, item):
+        self.rollup.add(item['url'], item['date'])
+        return item
@@ -13,15 +13,16 @@ import torch
 # Local application imports
 
 # Standard library imports
-import json
 import argparse
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 from scipy.signal import savgol_filter
 
-# Read the crawled data
-from tqdm import tqdm
+# Local application imports
+from aggregation import count_matrix, rollup_matrix
+from near_duplicates import load_story_dates
+from rollups import load_rollups
 
 # Set the site names
 site_names = ['laodong', '24h', 'kenh14', 'dantri', 'cafef',
@@ -33,24 +34,29 @@ date_end = '2020-12-31'
 date_list = pd.date_range(date_start, date_end).tolist()
 # date_list_display = [item.strftime('%d/%m/%y') for item in date_list]
 # date_list_display = [item.strftime('%d/%m') for item in date_list]
-date_list_txt = [item.strftime('%Y-%m-%d') for item in date_list]
 
 # Count the number of covid-19 related articles in each site
-n_articles_list = np.zeros(len(date_list))
+# from the rollups, only updated with the new Parquet parts of the columnar
+# store, or the new lines of the jsonlines files of the sites not in the store
+counts_by_site = load_rollups(site_names, parquet_dir='data/parquet')
 for site_name in site_names:
-    data = []
-    with open(f'data/{site_name}.jsonl') as f:
-        for line in f:
-            data.append(json.loads(line))
-    data_unique = list({v['url']:v for v in data}.values())
-    print(f'\nTotal number of covid-19 related articles in {site_name}: {len(data_unique)}')
-
-    for k, cur_date in tqdm(enumerate(date_list_txt), f'Counting news on {site_name}'):
-        n_articles_list[k] += len([item for item in data_unique
-                                  if item['date'] == cur_date])
+    print(f'\nTotal number of covid-19 related articles in {site_name}: '
+          f'{sum(counts_by_site[site_name].values())}')
+n_articles_sites, _ = rollup_matrix(counts_by_site, date_start, date_end)
+n_articles_list = n_articles_sites.sum(axis=0)
 print(f'\nTotal number of covid-19 related articles in the '
       f'{len(site_names)} sites: {np.sum(n_articles_list):.0f}')
 
+# Count the stories republished by several sites once, from the story index
+# built by near_duplicates.py
+story_dates = load_story_dates(site_names)
+if story_dates is None:
+    print('No story index, run near_duplicates.py to count the unique stories')
+else:
+    n_stories_list, _ = count_matrix({'stories': story_dates}, date_start, date_end)
+    print(f'Total number of unique covid-19 related stories in the '
+          f'{len(site_names)} sites: {np.sum(n_stories_list):.0f}')
+
 # Smooth the actual curve
 n_articles_smooth = savgol_filter(n_articles_list, 35, polyorder=3)
 
@@ -5,15 +5,13 @@ Created on 25/02/2021 11:35 pm
 @author: Soan Duong, UOW
 """
 # Standard library imports
-import json
 import argparse
-import numpy as np
-import pandas as pd
 import matplotlib.pyplot as plt
 from scipy.signal import savgol_filter
 
-# Read the crawled data
-from tqdm import tqdm
+# Local application imports
+from aggregation import rollup_matrix
+from rollups import load_rollups
 
 
 # ------------------------------------------------------------------------------
@@ -25,23 +23,22 @@ if __name__ == '__main__':
                       help='Name of the online newspaper, e.g. vnexpress and laodong.')
     args.add_argument('--out_dir', default='figs/', type=str,
                       help='Directory for saving the output plot')
+    args.add_argument('--rollup_dir', default='data/rollups/', type=str,
+                      help='Directory of the per-day counts, see rollups.py')
+    args.add_argument('--parquet_dir', default='data/parquet/', type=str,
+                      help='Root directory of the columnar store, see columnar_store.py')
     cmd_args = args.parse_args()
 
-data = []
-with open(f'data/{cmd_args.site_name}.jsonl') as f:
-    for line in f:
-        data.append(json.loads(line))
-data_unique = list({v['url']:v for v in data}.values())
-
 # Set the date range
 date_start = '2019-11-17'
 date_end = '2021-01-01'
-date_list = pd.date_range(date_start, date_end).tolist()
 
-n_articles = []
-for cur_date in tqdm(date_list, f'Counting news on {cmd_args.site_name}'):
-    n_articles.append(len([item for item in data_unique
-                           if item['date'] == cur_date.strftime('%Y-%m-%d')]))
+# Count the number of articles per day from the rollup of the site
+counts_by_site = load_rollups([cmd_args.site_name], rollup_dir=cmd_args.rollup_dir,
+                              parquet_dir=cmd_args.parquet_dir)
+n_articles, date_list = rollup_matrix(counts_by_site, date_start, date_end)
+n_articles = n_articles[0]
+date_list = date_list.tolist()
 
 # Smooth the actual curve
 n_articles_smooth = savgol_filter(n_articles, 35, polyorder=3)
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 18/10/2026 3:55 pm
+
+Per-site crawl profiles: concurrency, throttling, depth and retry settings
+"""
+# Standard library imports
+import json
+
+
+# Profile used for the keys not set by the site spec or the overrides
+DEFAULT_PROFILE = {'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                                 '(KHTML, like Gecko) Chrome/141.0.0.0 Safari/537.36',
+                   'concurrency': 8,
+                   'download_delay': 0,
+                   'start_delay': 1.,
+                   'max_delay': 30.,
+                   'autothrottle_target': 4.,
+                   'depth_limit': 0,
+                   'retry_times': 2}
+
+# Scrapy setting of each profile key
+PROFILE_SETTINGS = {'concurrency': 'CONCURRENT_REQUESTS_PER_DOMAIN',
+                    'download_delay': 'DOWNLOAD_DELAY',
+                    'start_delay': 'AUTOTHROTTLE_START_DELAY',
+                    'max_delay': 'AUTOTHROTTLE_MAX_DELAY',
+                    'autothrottle_target': 'AUTOTHROTTLE_TARGET_CONCURRENCY',
+                    'depth_limit': 'DEPTH_LIMIT',
+                    'retry_times': 'RETRY_TIMES',
+                    'user_agent': 'USER_AGENT'}
+
+
+def build_profile(spec, overrides=None):
+    """
+    Merge the default profile, the profile of the site spec and the overrides
+    :return: dictionary of {profile key: value}
+    """
+    profile = dict(DEFAULT_PROFILE, **spec.get('profile', {}))
+    profile.update(overrides or {})
+    unknown = [key for key in profile if key not in PROFILE_SETTINGS]
+    if unknown:
+        raise ValueError('Unknown profile keys {}, expected some of {}'.format(
+            unknown, list(PROFILE_SETTINGS)))
+    return profile
+
+
+def profile_settings(profile):
+    """
+    Scrapy settings of a profile. AutoThrottle adapts the download delay of
+    each host to its latency, aiming at 'autothrottle_target' parallel requests
+    within the 'concurrency' cap, so fast hosts get more requests in flight and
+    slow ones are backed off. The error responses never shorten the delay and
+    the 429/503 ones are retried 'retry_times' times. Each site has its own
+    crawler and downloader, whose global cap CONCURRENT_REQUESTS (16 by
+    default) is raised to the 'concurrency' of the site.
+    """
+    settings = {PROFILE_SETTINGS[key]: value for key, value in profile.items()}
+    settings['CONCURRENT_REQUESTS'] = max(16, profile['concurrency'])
+    settings['AUTOTHROTTLE_ENABLED'] = True
+    settings['AUTOTHROTTLE_TARGET_CONCURRENCY'] = min(profile['autothrottle_target'],
+                                                      profile['concurrency'])
+    return settings
+
+
+def parse_overrides(site_names, config_file=None, cli_overrides=()):
+    """
+    Read the profile overrides of the sites from a JSON config file, e.g.
+    {"default": {"depth_limit": 10}, "vnexpress": {"concurrency": 16}},
+    then from the command line, e.g. ['retry_times=3', 'vnexpress.concurrency=16']
+    :return: dictionary of {site name: {profile key: value}}
+    """
+    config = {}
+    if config_file is not None:
+        with open(config_file) as f:
+            config = json.load(f)
+    overrides = {site_name: dict(config.get('default', {}), **config.get(site_name, {}))
+                 for site_name in site_names}
+
+    for override in cli_overrides:
+        key, _, value = override.partition('=')
+        site_name, _, key = key.rpartition('.')
+        try:
+            value = json.loads(value)
+        except ValueError:
+            pass
+        for name in ([site_name] if site_name else site_names):
+            if name in overrides:
+                overrides[name][key] = value
+    return overrides
+
+
+def throughput_summary(crawlers):
+    """
+    Requests per second achieved by each crawler of a finished process,
+    counting the requests answered by a response
+    :return: list of (site name, requests, responses, seconds, requests/sec)
+    """
+    summary = []
+    for crawler in crawlers:
+        stats = crawler.stats.get_stats()
+        n_responses = stats.get('response_received_count', 0)
+        elapsed = stats.get('elapsed_time_seconds') or 0.
+        summary.append((crawler.spidercls.name, stats.get('downloader/request_count', 0),
+                        n_responses, elapsed, n_responses / elapsed if elapsed else 0.))
+    return sorted(summary)
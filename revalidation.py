@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 18/10/2026 4:15 pm
+
+Conditional GET of the listing pages crawled again by the recurring crawls
+"""
+# Standard library imports
+import os
+import sqlite3
+
+# Third party imports
+from scrapy import signals
+from scrapy.exceptions import IgnoreRequest, NotConfigured
+
+
+class ValidatorStore:
+    """
+    SQLite store of the ETag and Last-Modified validators of the listing
+    pages of a site, keyed by url, shared by the workers of a sharded crawl
+    """
+
+    def __init__(self, file_name, commit_every=100):
+        if os.path.dirname(file_name):
+            os.makedirs(os.path.dirname(file_name), exist_ok=True)
+        self.conn = sqlite3.connect(file_name, timeout=60)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS validators ('
+                          'url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT)')
+        self.commit_every = commit_every
+        self.n_uncommitted = 0
+
+    def __len__(self):
+        return self.conn.execute('SELECT COUNT(*) FROM validators').fetchone()[0]
+
+    def get(self, url):
+        """
+        :return: (etag, last modified), None if the url has no validators
+        """
+        return self.conn.execute('SELECT etag, last_modified FROM validators WHERE url = ?',
+                                 (url,)).fetchone()
+
+    def put(self, url, etag, last_modified):
+        self.conn.execute('INSERT OR REPLACE INTO validators VALUES (?, ?, ?)',
+                          (url, etag, last_modified))
+        self.count_change()
+
+    def delete(self, url):
+        self.conn.execute('DELETE FROM validators WHERE url = ?', (url,))
+        self.count_change()
+
+    def count_change(self):
+        self.n_uncommitted += 1
+        if self.n_uncommitted >= self.commit_every:
+            self.commit()
+
+    def commit(self):
+        self.conn.commit()
+        self.n_uncommitted = 0
+
+    def close(self):
+        self.commit()
+        self.conn.close()
+
+
+class RevalidationMiddleware:
+    """
+    Revalidate the listing pages fetched by the previous runs instead of
+    downloading them again.
+
+    The ETag and Last-Modified headers of the pages without the article
+    marker of the site spec are kept in a store per site in the
+    REVALIDATION_DIR setting. A page fetched again is requested with
+    If-None-Match and If-Modified-Since; when the site answers 304 Not
+    Modified, the request is dropped, so no links are extracted from the
+    unchanged listing, whose articles were already scheduled by an earlier
+    run. The share of the conditional requests answered 304 is the cache
+    hit ratio of the site, in the revalidation/hit_ratio stat.
+    """
+
+    def __init__(self, crawler, directory, commit_every=100):
+        self.crawler = crawler
+        self.directory = directory
+        self.stats = crawler.stats
+        self.commit_every = commit_every
+        self.store = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        directory = crawler.settings.get('REVALIDATION_DIR')
+        if not directory:
+            raise NotConfigured
+        mw = cls(crawler, directory, crawler.settings.getint('REVALIDATION_COMMIT_EVERY', 100))
+        crawler.signals.connect(mw.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(mw.spider_closed, signal=signals.spider_closed)
+        return mw
+
+    def spider_opened(self, spider):
+        self.store = ValidatorStore(os.path.join(self.directory, '{}.sqlite'.format(spider.name)),
+                                    self.commit_every)
+        self.stats.set_value('revalidation/size', len(self.store))
+
+    def spider_closed(self, spider):
+        n_requests = self.stats.get_value('revalidation/requests', 0)
+        if n_requests:
+            ratio = self.stats.get_value('revalidation/hits', 0) / n_requests
+            self.stats.set_value('revalidation/hit_ratio', round(ratio, 4))
+            spider.logger.info('Revalidation: %.1f%% of the %d conditional requests were not modified',
+                               100 * ratio, n_requests)
+        self.stats.set_value('revalidation/size', len(self.store))
+        self.store.close()
+
+    def is_listing(self, response):
+        site = getattr(self.crawler.spider, 'site', None)
+        if site is None or site.marker is None:
+            return True
+        return site.marker.search(response.body[:site.sniff_bytes]) is None
+
+    def process_request(self, request):
+        if request.method != 'GET' or request.meta.get('dont_revalidate'):
+            return None
+        validators = self.store.get(request.url)
+        if validators is None:
+            return None
+        etag, last_modified = validators
+        if etag:
+            request.headers.setdefault('If-None-Match', etag)
+        if last_modified:
+            request.headers.setdefault('If-Modified-Since', last_modified)
+        request.meta['revalidated'] = True
+        self.stats.inc_value('revalidation/requests')
+        return None
+
+    def process_response(self, request, response):
+        revalidated = request.meta.get('revalidated', False)
+        if response.status == 304 and revalidated:
+            self.stats.inc_value('revalidation/hits')
+            raise IgnoreRequest('Not modified: {}'.format(request.url))
+        if response.status != 200:
+            return response
+        if revalidated:
+            self.stats.inc_value('revalidation/misses')
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if (etag or last_modified) and self.is_listing(response):
+            self.store.put(request.url, etag.decode('latin-1') if etag else None,
+                           last_modified.decode('latin-1') if last_modified else None)
+        elif revalidated:
+            self.store.delete(request.url)
+        return response
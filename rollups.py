@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 18/10/2026 3:47 pm
+
+Pre-aggregated per-day article counts of each site
+"""
+# Standard library imports
+import os
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+# Third party imports
+import numpy as np
+
+# Local application imports
+from seen_store import FingerprintSet, url_fingerprint
+from jsonl_reader import iter_records
+try:
+    from columnar_store import has_site, part_files, read_columns
+except ImportError:
+    has_site = part_files = read_columns = None
+
+
+class DailyRollup:
+    """
+    Per-day counts of the unique articles of a site.
+
+    The counts are stored in <directory>/<site_name>.rollup.json and the url
+    fingerprints of the counted articles in <directory>/<site_name>.rollup.npy.
+    The crawler adds the items as they are emitted. The counts also keep the
+    size, modification time and read offset of the site's jsonlines file, so
+    only the part written since the last update is read, and the rollup is
+    rebuilt only when the file was rewritten.
+
+    When the site is in the columnar store (see columnar_store.py), the
+    rollup is built from the store instead, only reading the date and url
+    columns of the Parquet parts written since the last update.
+    """
+
+    def __init__(self, directory, site_name):
+        os.makedirs(directory, exist_ok=True)
+        self.site_name = site_name
+        self.file_name = os.path.join(directory, '{}.rollup.json'.format(site_name))
+        self.fp_file_name = os.path.join(directory, '{}.rollup.npy'.format(site_name))
+        self.counts = {}
+        self.source = {}
+        fingerprints = None
+        if os.path.exists(self.file_name) and os.path.exists(self.fp_file_name):
+            with open(self.file_name) as f:
+                state = json.load(f)
+            self.counts = state['counts']
+            self.source = state['source']
+            fingerprints = np.load(self.fp_file_name)
+        self.urls = FingerprintSet(fingerprints)
+
+    def add(self, url, date):
+        """
+        Count the article of the url on the date ('YYYY-MM-DD') if it is new
+        """
+        if self.urls.add(url_fingerprint(url)):
+            self.counts[date] = self.counts.get(date, 0) + 1
+            return True
+        return False
+
+    def reset(self):
+        self.counts = {}
+        self.source = {}
+        self.urls = FingerprintSet()
+
+    def update_from_jsonl(self, file_name):
+        """
+        Bring the counts up to date with the crawled jsonlines file
+        :return: True if the rollup changed
+        """
+        if not os.path.exists(file_name):
+            return False
+        file_name = os.path.normpath(file_name)
+        stat = os.stat(file_name)
+        offset = self.source.get('offset', 0)
+        if self.source.get('file') != file_name or stat.st_size < offset or \
+                (stat.st_size == offset and stat.st_mtime != self.source.get('mtime')):
+            # The file is new or was rewritten, rebuild the rollup
+            self.reset()
+            offset = 0
+        elif stat.st_size == offset:
+            return False
+
+        for offset, (url, date) in iter_records(file_name, ('url', 'date'), offset):
+            self.add(url, date)
+        self.source = {'file': file_name, 'offset': offset,
+                       'size': stat.st_size, 'mtime': stat.st_mtime}
+        return True
+
+    def update_from_store(self, root):
+        """
+        Bring the counts up to date with the parts of the site in the columnar store
+        :return: True if the rollup changed
+        """
+        root = os.path.normpath(root)
+        parts = part_files(root, self.site_name)
+        counted = set(self.source.get('parts', []))
+        if self.source.get('store') != root or not counted.issubset(parts):
+            # The store is new or its parts were rewritten, rebuild the rollup
+            self.reset()
+            counted = set()
+        new_parts = [part for part in parts if part not in counted]
+        if not new_parts:
+            return False
+
+        table = read_columns(root, ('date', 'url'), files=new_parts)
+        for url, date in zip(table['url'].to_pylist(), table['date'].to_pylist()):
+            self.add(url, date.strftime('%Y-%m-%d'))
+        self.source = {'store': root, 'parts': parts}
+        return True
+
+    def save(self):
+        self.urls.merge()
+        np.save(self.fp_file_name, self.urls.fingerprints)
+        with open(self.file_name, 'w') as f:
+            json.dump({'source': self.source, 'counts': self.counts}, f)
+
+
+def update_rollup(site_name, data_dir='data', rollup_dir='data/rollups', parquet_dir=None):
+    """
+    Update the rollup of a site from the columnar store in parquet_dir when
+    the site is there, otherwise from its jsonlines file, if it changed
+    :return: the per-day counts of the site, {'YYYY-MM-DD': count}
+    """
+    rollup = DailyRollup(rollup_dir, site_name)
+    if parquet_dir is not None and has_site is not None and has_site(parquet_dir, site_name):
+        changed = rollup.update_from_store(parquet_dir)
+    else:
+        changed = rollup.update_from_jsonl(os.path.join(data_dir, '{}.jsonl'.format(site_name)))
+    if changed:
+        rollup.save()
+    return rollup.counts
+
+
+def load_rollups(site_names, data_dir='data', rollup_dir='data/rollups', parquet_dir=None, n_procs=1):
+    """
+    Load the per-day counts of the sites, updating the rollups from the
+    columnar store or the jsonlines files that changed since they were written
+    :param parquet_dir: root of the columnar store, None to only read the jsonlines files
+    :param n_procs: number of processes updating the sites in parallel
+    :return: dictionary of {site name: {'YYYY-MM-DD': count}}
+    """
+    if n_procs == 1:
+        counts = [update_rollup(site_name, data_dir, rollup_dir, parquet_dir) for site_name in site_names]
+    else:
+        with ProcessPoolExecutor(n_procs) as pool:
+            counts = list(pool.map(update_rollup, site_names, [data_dir] * len(site_names),
+                                   [rollup_dir] * len(site_names), [parquet_dir] * len(site_names)))
+    return dict(zip(site_names, counts))
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 18/10/2026 3:43 pm
+
+Persistent, compact set of the article urls already crawled
+"""
+# Standard library imports
+import os
+import json
+from hashlib import blake2b
+
+# Third party imports
+import numpy as np
+
+# Local application imports
+from urls import canonicalize_url
+from jsonl_reader import iter_records
+
+
+def url_fingerprint(url):
+    # Fingerprint of the canonical form of the url
+    url = canonicalize_url(url)
+    return int.from_bytes(blake2b(url.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+class FingerprintSet:
+    """
+    Compact set of 64-bit fingerprints: a sorted numpy array, searched by
+    bisection, plus a small set of the recent additions merged into the
+    array once it grows past merge_every
+    """
+
+    def __init__(self, fingerprints=None, merge_every=10000):
+        self.fingerprints = np.zeros(0, dtype=np.uint64)
+        if fingerprints is not None:
+            self.fingerprints = np.unique(np.asarray(fingerprints, dtype=np.uint64))
+        self.recent = set()
+        self.merge_every = merge_every
+
+    def __len__(self):
+        return len(self.fingerprints) + len(self.recent)
+
+    def __contains__(self, fp):
+        if fp in self.recent:
+            return True
+        k = np.searchsorted(self.fingerprints, np.uint64(fp))
+        return k < len(self.fingerprints) and self.fingerprints[k] == fp
+
+    def add(self, fp):
+        """
+        Add the fingerprint, return False if it was already in the set
+        """
+        if fp in self:
+            return False
+        self.recent.add(fp)
+        if len(self.recent) >= self.merge_every:
+            self.merge()
+        return True
+
+    def merge(self):
+        recent = np.fromiter(self.recent, dtype=np.uint64, count=len(self.recent))
+        self.fingerprints = np.union1d(self.fingerprints, recent)
+        self.recent = set()
+
+
+class SeenUrlStore:
+    """
+    On-disk hash set of url fingerprints (8 bytes per url).
+
+    The fingerprints are appended to <directory>/<site_name>.seen and held in
+    memory in a FingerprintSet. The store is seeded from the crawled
+    jsonlines file, reading only the part written since the last seeding.
+    The new fingerprints are appended by a single write per flush, so the
+    workers of a sharded crawl can share the store of the site.
+    """
+
+    def __init__(self, directory, site_name, merge_every=10000, flush_every=100):
+        os.makedirs(directory, exist_ok=True)
+        self.file_name = os.path.join(directory, '{}.seen'.format(site_name))
+        self.meta_file_name = self.file_name + '.json'
+        self.flush_every = flush_every
+
+        fingerprints = None
+        if os.path.exists(self.file_name):
+            fingerprints = np.fromfile(self.file_name, dtype=np.uint64)
+        self.fingerprints = FingerprintSet(fingerprints, merge_every)
+        self.unflushed = []
+        self.fd = os.open(self.file_name, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+        self.meta = {}
+        if os.path.exists(self.meta_file_name):
+            with open(self.meta_file_name) as f:
+                self.meta = json.load(f)
+
+    def __len__(self):
+        return len(self.fingerprints)
+
+    def __contains__(self, url):
+        return url_fingerprint(url) in self.fingerprints
+
+    def add(self, url):
+        """
+        Add the url, return False if it was already in the store
+        """
+        fp = url_fingerprint(url)
+        if not self.fingerprints.add(fp):
+            return False
+        self.unflushed.append(fp)
+        if len(self.unflushed) >= self.flush_every:
+            self.flush()
+        return True
+
+    def flush(self):
+        if self.unflushed:
+            os.write(self.fd, np.array(self.unflushed, dtype=np.uint64).tobytes())
+            self.unflushed = []
+
+    def seed_from_jsonl(self, file_name):
+        """
+        Add the urls of the crawled jsonlines file written since the last seeding
+        """
+        if not os.path.exists(file_name):
+            return 0
+        offset = self.meta.get(file_name, 0)
+        if offset > os.path.getsize(file_name):
+            # The file was rewritten, seed it again
+            offset = 0
+        n_added = 0
+        for offset, (url,) in iter_records(file_name, ('url',), offset):
+            n_added += self.add(url)
+        self.meta[file_name] = offset
+        self.save_meta()
+        return n_added
+
+    def save_meta(self):
+        tmp_name = '{}.{}.tmp'.format(self.meta_file_name, os.getpid())
+        with open(tmp_name, 'w') as f:
+            json.dump(self.meta, f)
+        os.replace(tmp_name, self.meta_file_name)
+
+    def close(self):
+        self.flush()
+        os.close(self.fd)
@@ -0,0 +1,448 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 18/10/2026 4:12 pm
+
+Sharded crawl of a site by several worker processes or nodes, sharing their
+frontier and seen urls through a SQLite file or a Redis server
+"""
+# Standard library imports
+import os
+import json
+import time
+import shutil
+import sqlite3
+
+# Third party imports
+from scrapy import signals, Request
+from scrapy.exceptions import DontCloseSpider, NotConfigured
+from twisted.internet.task import LoopingCall
+try:
+    import redis
+except ImportError:
+    redis = None
+
+# Local application imports
+from seen_store import url_fingerprint
+
+
+# Request meta handed over with the urls of the other shards
+SHARED_META = ('rule', 'depth', 'source_page', 'estimated')
+
+
+def shard_of(fingerprint, n_shards):
+    """
+    Shard of a url from its fingerprint, see seen_store.url_fingerprint
+    """
+    return fingerprint % n_shards
+
+
+def to_entry(request):
+    """
+    Serialize the request of another shard, with its callback names, priority
+    and shared meta, e.g. the CrawlSpider rule index and the depth
+    """
+    return json.dumps({'url': request.url,
+                       'callback': getattr(request.callback, '__name__', None),
+                       'errback': getattr(request.errback, '__name__', None),
+                       'priority': request.priority,
+                       'meta': {key: request.meta[key] for key in SHARED_META if key in request.meta}})
+
+
+def from_entry(entry, spider):
+    entry = json.loads(entry)
+    return Request(entry['url'],
+                   callback=getattr(spider, entry['callback']) if entry['callback'] else None,
+                   errback=getattr(spider, entry['errback']) if entry['errback'] else None,
+                   priority=entry['priority'], meta=entry['meta'])
+
+
+def signed(fingerprint):
+    # SQLite integers are signed 64-bit
+    return fingerprint - (1 << 64) if fingerprint >= 1 << 63 else fingerprint
+
+
+class SqliteBackend:
+    """
+    Shared frontier and seen urls of the workers of a single machine, in a
+    SQLite file in WAL mode. Each operation is a single write transaction,
+    so the completion check sees a consistent state of all the shards.
+
+    The backends share the same interface: reset, mark_busy, is_finished,
+    claim, push, pop, touch and idle. A worker is busy from the reset until it finds itself idle,
+    and busy again once it pops urls. The crawl is finished when every
+    worker is idle, or has not reported for timeout seconds, and every
+    frontier is empty.
+    """
+
+    def __init__(self, file_name, n_shards, timeout=300):
+        if os.path.dirname(file_name):
+            os.makedirs(os.path.dirname(file_name), exist_ok=True)
+        self.n_shards = n_shards
+        self.timeout = timeout
+        self.conn = sqlite3.connect(file_name, timeout=60, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(
+            'CREATE TABLE IF NOT EXISTS seen (fingerprint INTEGER PRIMARY KEY);'
+            'CREATE TABLE IF NOT EXISTS frontier (id INTEGER PRIMARY KEY AUTOINCREMENT, '
+            'shard INTEGER, entry TEXT);'
+            'CREATE INDEX IF NOT EXISTS frontier_shard ON frontier (shard, id);'
+            'CREATE TABLE IF NOT EXISTS workers (shard INTEGER PRIMARY KEY, busy INTEGER, '
+            'updated REAL);')
+
+    def transaction(self, operation, *args):
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            result = operation(*args)
+        except BaseException:
+            self.conn.execute('ROLLBACK')
+            raise
+        self.conn.execute('COMMIT')
+        return result
+
+    def reset(self):
+        """
+        Forget the urls of the previous crawl and mark every worker busy
+        """
+        def reset():
+            self.conn.execute('DELETE FROM seen')
+            self.conn.execute('DELETE FROM frontier')
+            self.conn.execute('DELETE FROM workers')
+            self.conn.executemany('INSERT INTO workers VALUES (?, 1, ?)',
+                                  [(shard, time.time()) for shard in range(self.n_shards)])
+        self.transaction(reset)
+
+    def mark_busy(self, shards):
+        """
+        Mark the workers of a resumed crawl busy until they find themselves idle
+        """
+        self.transaction(self.conn.executemany, 'INSERT OR REPLACE INTO workers VALUES (?, 1, ?)',
+                         [(shard, time.time()) for shard in shards])
+
+    def is_finished(self):
+        """
+        :return: True if the last crawl finished, False if it was interrupted
+        """
+        n_busy = self.conn.execute('SELECT COUNT(*) FROM workers WHERE busy = 1').fetchone()[0]
+        n_pending = self.conn.execute('SELECT COUNT(*) FROM frontier').fetchone()[0]
+        return n_busy == 0 and n_pending == 0
+
+    def claim(self, fingerprints):
+        """
+        Add the url fingerprints to the seen urls
+        :return: list of booleans, True for the fingerprints not seen before
+        """
+        def claim():
+            return [self.conn.execute('INSERT OR IGNORE INTO seen VALUES (?)',
+                                      (signed(fp),)).rowcount == 1 for fp in fingerprints]
+        return self.transaction(claim)
+
+    def push(self, entries):
+        """
+        :param entries: list of (shard, serialized request)
+        """
+        self.transaction(self.conn.executemany, 'INSERT INTO frontier (shard, entry) VALUES (?, ?)',
+                         entries)
+
+    def pop(self, shard, n):
+        """
+        Take up to n requests from the frontier of a shard, the oldest first
+        :return: list of serialized requests
+        """
+        def pop():
+            rows = self.conn.execute('SELECT id, entry FROM frontier WHERE shard = ? ORDER BY id LIMIT ?',
+                                     (shard, n)).fetchall()
+            if rows:
+                self.conn.execute('DELETE FROM frontier WHERE shard = ? AND id <= ?', (shard, rows[-1][0]))
+                self.conn.execute('INSERT OR REPLACE INTO workers VALUES (?, 1, ?)', (shard, time.time()))
+            return [entry for _, entry in rows]
+        return self.transaction(pop)
+
+    def touch(self, shard):
+        self.transaction(self.conn.execute, 'UPDATE workers SET updated = ? WHERE shard = ?',
+                         (time.time(), shard))
+
+    def idle(self, shard):
+        """
+        Mark a worker idle
+        :return: True if the crawl is finished
+        """
+        def idle():
+            now = time.time()
+            self.conn.execute('INSERT OR REPLACE INTO workers VALUES (?, 0, ?)', (shard, now))
+            n_busy = self.conn.execute('SELECT COUNT(*) FROM workers WHERE busy = 1 AND updated > ?',
+                                       (now - self.timeout,)).fetchone()[0]
+            n_pending = self.conn.execute('SELECT COUNT(*) FROM frontier').fetchone()[0]
+            return n_busy == 0 and n_pending == 0
+        return self.transaction(idle)
+
+    def close(self):
+        self.conn.close()
+
+
+# Completion check of the Redis backend, run atomically by the server
+REDIS_IDLE = """
+redis.call('HSET', KEYS[1], ARGV[1], 0)
+redis.call('HSET', KEYS[2], ARGV[1], ARGV[2])
+local deadline = tonumber(ARGV[2]) - tonumber(ARGV[3])
+for shard = 0, tonumber(ARGV[4]) - 1 do
+    if redis.call('LLEN', KEYS[3] .. shard) > 0 then
+        return 0
+    end
+    local busy = redis.call('HGET', KEYS[1], shard)
+    local updated = redis.call('HGET', KEYS[2], shard)
+    if busy == '1' and updated and tonumber(updated) > deadline then
+        return 0
+    end
+end
+return 1
+"""
+
+REDIS_POP = """
+local entries = redis.call('LRANGE', KEYS[1], 0, tonumber(ARGV[2]) - 1)
+if #entries > 0 then
+    redis.call('LTRIM', KEYS[1], #entries, -1)
+    redis.call('HSET', KEYS[2], ARGV[1], 1)
+    redis.call('HSET', KEYS[3], ARGV[1], ARGV[3])
+end
+return entries
+"""
+
+
+class RedisBackend:
+    """
+    Shared frontier and seen urls of workers on several machines, in a Redis
+    server: a set of the seen fingerprints, a list per shard frontier and two
+    hashes of the worker states. The pop and the completion check are Lua
+    scripts, so they are atomic like the transactions of SqliteBackend.
+    """
+
+    def __init__(self, url, n_shards, timeout=300, prefix='crawl'):
+        if redis is None:
+            raise NotConfigured('The redis package is required by the Redis shard backend')
+        self.client = redis.Redis.from_url(url)
+        self.n_shards = n_shards
+        self.timeout = timeout
+        self.seen_key = '{}:seen'.format(prefix)
+        self.frontier_key = '{}:frontier:'.format(prefix)
+        self.busy_key = '{}:busy'.format(prefix)
+        self.updated_key = '{}:updated'.format(prefix)
+        self.idle_script = self.client.register_script(REDIS_IDLE)
+        self.pop_script = self.client.register_script(REDIS_POP)
+
+    def reset(self):
+        now = time.time()
+        pipe = self.client.pipeline(transaction=True)
+        pipe.delete(self.seen_key, self.busy_key, self.updated_key,
+                    *['{}{}'.format(self.frontier_key, shard) for shard in range(self.n_shards)])
+        pipe.hset(self.busy_key, mapping={shard: 1 for shard in range(self.n_shards)})
+        pipe.hset(self.updated_key, mapping={shard: now for shard in range(self.n_shards)})
+        pipe.execute()
+
+    def mark_busy(self, shards):
+        now = time.time()
+        pipe = self.client.pipeline(transaction=True)
+        pipe.hset(self.busy_key, mapping={shard: 1 for shard in shards})
+        pipe.hset(self.updated_key, mapping={shard: now for shard in shards})
+        pipe.execute()
+
+    def is_finished(self):
+        if any(busy == b'1' for busy in self.client.hvals(self.busy_key)):
+            return False
+        return all(self.client.llen('{}{}'.format(self.frontier_key, shard)) == 0
+                   for shard in range(self.n_shards))
+
+    def claim(self, fingerprints):
+        pipe = self.client.pipeline(transaction=False)
+        for fp in fingerprints:
+            pipe.sadd(self.seen_key, fp)
+        return [added == 1 for added in pipe.execute()]
+
+    def push(self, entries):
+        pipe = self.client.pipeline(transaction=False)
+        for shard, entry in entries:
+            pipe.rpush('{}{}'.format(self.frontier_key, shard), entry)
+        pipe.execute()
+
+    def pop(self, shard, n):
+        entries = self.pop_script(keys=['{}{}'.format(self.frontier_key, shard), self.busy_key,
+                                        self.updated_key], args=[shard, n, time.time()])
+        return [entry.decode('utf-8') for entry in entries]
+
+    def touch(self, shard):
+        self.client.hset(self.updated_key, shard, time.time())
+
+    def idle(self, shard):
+        return self.idle_script(keys=[self.busy_key, self.updated_key, self.frontier_key],
+                                args=[shard, time.time(), self.timeout, self.n_shards]) == 1
+
+    def close(self):
+        self.client.close()
+
+
+def open_backend(uri, n_shards, timeout=300):
+    """
+    :param uri: 'redis://host:port/db' for a Redis server, otherwise the SQLite file
+    """
+    if uri.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisBackend(uri, n_shards, timeout)
+    return SqliteBackend(uri, n_shards, timeout)
+
+
+class ShardMiddleware:
+    """
+    Spider middleware of a worker of a sharded crawl, set up by the
+    SHARD_BACKEND, SHARD_COUNT and SHARD_INDEX settings.
+
+    The urls are hash-partitioned across the shards. The requests output by
+    the spider are checked against the shared seen urls, those of the worker
+    shard go to its scheduler as usual and those of the other shards are
+    pushed to their frontier in the backend. Each worker polls its own
+    frontier every SHARD_POLL_INTERVAL seconds and when idle, and only
+    closes once the whole crawl is finished.
+    """
+
+    def __init__(self, crawler, backend, shard, n_shards, poll_interval, batch_size):
+        self.crawler = crawler
+        self.backend = backend
+        self.shard = shard
+        self.n_shards = n_shards
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.task = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        n_shards = settings.getint('SHARD_COUNT', 0)
+        if n_shards < 2:
+            raise NotConfigured
+        backend = open_backend(settings.get('SHARD_BACKEND'), n_shards,
+                               settings.getfloat('SHARD_TIMEOUT', 300.))
+        mw = cls(crawler, backend, settings.getint('SHARD_INDEX'), n_shards,
+                 settings.getfloat('SHARD_POLL_INTERVAL', 1.), settings.getint('SHARD_BATCH_SIZE', 100))
+        crawler.signals.connect(mw.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(mw.spider_idle, signal=signals.spider_idle)
+        crawler.signals.connect(mw.spider_closed, signal=signals.spider_closed)
+        return mw
+
+    def spider_opened(self, spider):
+        self.task = LoopingCall(self.poll)
+        self.task.start(self.poll_interval, now=False)
+
+    def spider_closed(self, spider):
+        if self.task is not None and self.task.running:
+            self.task.stop()
+        self.backend.close()
+
+    def poll(self):
+        # Schedule the requests pushed by the other shards
+        entries = self.backend.pop(self.shard, self.batch_size)
+        if not entries:
+            self.backend.touch(self.shard)
+        for entry in entries:
+            self.crawler.engine.crawl(from_entry(entry, self.crawler.spider))
+        self.crawler.stats.inc_value('shard/received', len(entries))
+        return len(entries)
+
+    def spider_idle(self, spider):
+        if self.poll() or not self.backend.idle(self.shard):
+            raise DontCloseSpider
+
+    def route(self, requests):
+        """
+        Keep the new requests of the shard, push the new ones of the other
+        shards to the backend
+        """
+        fingerprints = [url_fingerprint(request.url) for request in requests]
+        is_new = self.backend.claim(fingerprints)
+        kept, routed = [], []
+        for request, fp, new in zip(requests, fingerprints, is_new):
+            if not new:
+                self.crawler.stats.inc_value('shard/duplicates')
+            elif shard_of(fp, self.n_shards) == self.shard:
+                kept.append(request)
+            else:
+                routed.append((shard_of(fp, self.n_shards), to_entry(request)))
+        if routed:
+            self.backend.push(routed)
+            self.crawler.stats.inc_value('shard/routed', len(routed))
+        return kept
+
+    def split(self, result):
+        requests = [o for o in result if isinstance(o, Request)]
+        return [o for o in result if not isinstance(o, Request)], requests
+
+    async def process_start(self, start):
+        # Every worker outputs the same start requests, each keeps those of its shard
+        async for o in start:
+            if not isinstance(o, Request):
+                yield o
+                continue
+            fp = url_fingerprint(o.url)
+            if shard_of(fp, self.n_shards) == self.shard:
+                self.backend.claim([fp])
+                yield o
+
+    def process_spider_output(self, response, result):
+        # The requests of a response are routed together, in one backend transaction
+        items, requests = self.split(list(result))
+        yield from items
+        if requests:
+            yield from self.route(requests)
+
+    async def process_spider_output_async(self, response, result):
+        items, requests = self.split([o async for o in result])
+        for item in items:
+            yield item
+        if requests:
+            for request in self.route(requests):
+                yield request
+
+
+def shard_settings(settings, site_name, shard, n_shards, backend_uri):
+    """
+    Settings of a worker of a sharded crawl: the spider middleware, and a
+    feed, job directory and metrics file per shard. The seen url store, the
+    archive and the validator store stay the ones of the site, shared by the
+    workers, so they do not depend on the number of shards; the seen urls
+    are seeded from the feed of the site.
+    """
+    settings = dict(settings, SHARD_BACKEND=backend_uri, SHARD_COUNT=n_shards, SHARD_INDEX=shard,
+                    SPIDER_MIDDLEWARES=dict(settings.get('SPIDER_MIDDLEWARES', {}),
+                                            **{'sharding.ShardMiddleware': 800}),
+                    SEEN_SEED_URI=settings['FEED_URI'],
+                    HTTP_ARCHIVE_COMMIT_EVERY=1,
+                    REVALIDATION_COMMIT_EVERY=1)
+    suffix = 'shard-{}-of-{}'.format(shard, n_shards)
+    feed_dir = os.path.join(os.path.dirname(settings['FEED_URI']), 'shards')
+    settings['FEED_URI'] = os.path.join(feed_dir, '%(name)s.{}.jsonl'.format(suffix))
+    if settings.get('JOBDIR'):
+        settings['JOBDIR'] = os.path.join(settings['JOBDIR'], suffix)
+    if settings.get('METRICS_FILE'):
+        root, ext = os.path.splitext(settings['METRICS_FILE'])
+        settings['METRICS_FILE'] = '{}.{}{}'.format(root, suffix, ext)
+    # The rollup of the site is updated from the merged feed
+    settings['ITEM_PIPELINES'] = {name: order for name, order in settings['ITEM_PIPELINES'].items()
+                                  if name != 'pipelines.RollupPipeline'}
+    return settings
+
+
+def merge_shard_feeds(feed_uri, site_name, shards, n_shards):
+    """
+    Append the feeds of the shards to the feed of the site, and remove them
+    :return: number of articles merged
+    """
+    file_name = feed_uri % {'name': site_name}
+    n_merged = 0
+    with open(file_name, 'ab') as f_out:
+        for shard in shards:
+            shard_file = os.path.join(os.path.dirname(file_name), 'shards', '{}.shard-{}-of-{}.jsonl'.format(
+                site_name, shard, n_shards))
+            if not os.path.exists(shard_file):
+                continue
+            with open(shard_file, 'rb') as f_in:
+                n_merged += sum(1 for line in f_in if line.strip())
+                f_in.seek(0)
+                shutil.copyfileobj(f_in, f_out)
+            os.remove(shard_file)
+    return n_merged
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 18/10/2026 3:42 pm
+
+Streaming parser of the sitemaps and RSS feeds used for article discovery
+"""
+# Standard library imports
+import re
+import zlib
+from email.utils import parsedate_to_datetime
+
+# Third party imports
+from lxml import etree
+
+# Local application imports
+from dates import parse_iso, to_local
+
+
+SITEMAP_LINE = re.compile(r'^\s*sitemap:\s*(\S+)', re.IGNORECASE | re.MULTILINE)
+ENTRY_TAGS = {'sitemap', 'url', 'item'}
+FIELD_TAGS = {'loc': 'loc', 'link': 'loc', 'lastmod': 'lastmod',
+              'publication_date': 'published', 'pubDate': 'published'}
+
+
+def robots_sitemaps(text):
+    """
+    Get the sitemap urls declared in a robots.txt
+    """
+    return SITEMAP_LINE.findall(text)
+
+
+def parse_entry_date(value):
+    """
+    Parse a W3C datetime (sitemaps) or an RFC 822 date (RSS) as a naive
+    Vietnam datetime
+    """
+    value = value.strip()
+    try:
+        art_date = parse_iso(value)
+    except ValueError:
+        try:
+            art_date = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+    return to_local(art_date)
+
+
+def iter_entries(body, chunk_size=1 << 16):
+    """
+    Stream the entries of a sitemap index, a sitemap or an RSS feed.
+    The (optionally gzipped) body is decompressed and fed to an incremental
+    XML parser chunk by chunk, and every parsed entry is freed right away,
+    so the memory does not grow with the size of the file.
+    :return: generator of (kind, loc, lastmod, published) where kind is
+             'sitemap', 'url' or 'item' and the dates are datetimes or None
+    """
+    decompressor = None
+    if body[:2] == b'\x1f\x8b':
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    parser = etree.XMLPullParser(events=('start', 'end'), recover=True,
+                                 resolve_entities=False, no_network=True)
+
+    entry = {}
+    for k in range(0, len(body), chunk_size):
+        chunk = body[k:k + chunk_size]
+        if decompressor is not None:
+            chunk = decompressor.decompress(chunk)
+        parser.feed(chunk)
+        for event, el in parser.read_events():
+            if not isinstance(el.tag, str):
+                continue
+            tag = etree.QName(el).localname
+            if event == 'start':
+                if tag in ENTRY_TAGS:
+                    entry = {}
+            elif tag in FIELD_TAGS:
+                if el.text:
+                    entry[FIELD_TAGS[tag]] = el.text.strip()
+            elif tag in ENTRY_TAGS:
+                if 'loc' in entry:
+                    yield (tag, entry['loc'],
+                           parse_entry_date(entry['lastmod']) if 'lastmod' in entry else None,
+                           parse_entry_date(entry['published']) if 'published' in entry else None)
+                entry = {}
+                # Free the entry and the already parsed siblings
+                el.clear()
+                while el.getprevious() is not None:
+                    del el.getparent()[0]
+    parser.close()
+
+
+def entry_in_window(lastmod, published, start_date, end_date):
+    """
+    Check if an entry may hold an article published in [start_date, end_date).
+    The publication date is checked against both ends. The last modification
+    date only bounds the publication date from above, so it can only exclude
+    entries last modified before the window.
+    """
+    if published is not None:
+        return start_date <= published and (end_date is None or published < end_date)
+    if lastmod is not None:
+        return lastmod >= start_date
+    return True
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 18/10/2026 3:58 pm
+
+Memory-bounded scheduler queue spilling the pending requests to disk
+"""
+# Standard library imports
+import os
+import shutil
+import tempfile
+import weakref
+
+# Third party imports
+from scrapy.squeues import PickleLifoDiskQueue
+
+
+class RamBudget:
+    """
+    Number of requests the queues of a crawler may keep in memory together
+    """
+
+    def __init__(self, max_requests, directory):
+        self.max_requests = max_requests
+        self.directory = directory
+        self.n_requests = 0
+
+    def __del__(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+# Budget shared by the queues of each crawler
+BUDGETS = weakref.WeakKeyDictionary()
+
+
+def crawler_budget(crawler):
+    if crawler not in BUDGETS:
+        settings = crawler.settings
+        directory = settings.get('SCHEDULER_SPILL_DIR')
+        if directory:
+            directory = os.path.join(directory, crawler.spidercls.name)
+            os.makedirs(directory, exist_ok=True)
+        else:
+            directory = tempfile.mkdtemp(prefix='spill-{}-'.format(crawler.spidercls.name))
+        BUDGETS[crawler] = RamBudget(settings.getint('SCHEDULER_RAM_BUDGET', 10000), directory)
+    return BUDGETS[crawler]
+
+
+class SpillingLifoQueue:
+    """
+    Last-in first-out request queue, used as SCHEDULER_MEMORY_QUEUE, keeping
+    the newest requests in memory and spilling the oldest ones to a pickled
+    disk queue once the queues of the crawler hold SCHEDULER_RAM_BUDGET
+    requests (a request takes about 1 to 2 KB).
+
+    The requests are spilled and loaded back in chunks of a tenth of the
+    budget, oldest first, so the order is exactly the one of a memory LIFO
+    queue: the scheduler still pops the highest priority first, then the
+    newest request, which keeps a depth-first crawl and a small working set.
+    """
+
+    def __init__(self, crawler, key):
+        self.crawler = crawler
+        self.key = key
+        self.budget = crawler_budget(crawler)
+        self.chunk_size = max(1, self.budget.max_requests // 10)
+        self.memory = []
+        self.disk = None
+        self.n_disk = 0
+
+    @classmethod
+    def from_crawler(cls, crawler, key, *args, **kwargs):
+        return cls(crawler, key)
+
+    def __len__(self):
+        return len(self.memory) + self.n_disk
+
+    def disk_queue(self):
+        if self.disk is None:
+            path = os.path.join(self.budget.directory, self.key.replace('/', '_').strip('_') or 'queue')
+            if os.path.exists(path):
+                # Left by an interrupted crawl, the requests in memory were lost with it
+                os.remove(path)
+            self.disk = PickleLifoDiskQueue(self.crawler, path)
+        return self.disk
+
+    def push(self, request):
+        self.memory.append(request)
+        self.budget.n_requests += 1
+        if self.budget.n_requests > self.budget.max_requests and len(self.memory) > 1:
+            self.spill()
+
+    def spill(self):
+        # Move the oldest requests in memory to the top of the disk queue
+        n_spilled = min(self.chunk_size, len(self.memory) - 1)
+        disk = self.disk_queue()
+        for request in self.memory[:n_spilled]:
+            disk.push(request)
+        del self.memory[:n_spilled]
+        self.n_disk += n_spilled
+        self.budget.n_requests -= n_spilled
+        self.crawler.stats.inc_value('scheduler/spilled', n_spilled)
+
+    def load(self):
+        # Bring back the newest chunk of the disk queue, keeping its order
+        n_loaded = min(self.chunk_size, self.n_disk)
+        chunk = [self.disk.pop() for _ in range(n_loaded)]
+        self.memory = chunk[::-1] + self.memory
+        self.n_disk -= n_loaded
+        self.budget.n_requests += n_loaded
+
+    def pop(self):
+        if not self.memory and self.n_disk:
+            self.load()
+        if not self.memory:
+            return None
+        self.budget.n_requests -= 1
+        return self.memory.pop()
+
+    def peek(self):
+        if not self.memory and self.n_disk:
+            self.load()
+        return self.memory[-1] if self.memory else None
+
+    def close(self):
+        self.budget.n_requests -= len(self.memory)
+        self.memory = []
+        if self.disk is not None:
+            path = self.disk.path
+            self.disk.close()
+            self.disk = None
+            if os.path.exists(path):
+                os.remove(path)
+        self.n_disk = 0
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 18/10/2026 4:25 pm
+
+Check that the concurrency of a crawl profile is really reached by the
+downloader, against a local server answering slowly
+"""
+# Standard library imports
+import sys
+import time
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Third party imports
+import scrapy
+from scrapy.crawler import CrawlerProcess
+
+# Local application imports
+from profiles import build_profile, profile_settings
+
+
+class SlowHandler(BaseHTTPRequestHandler):
+    """
+    Answer every page after a delay, with links to the next pages, and
+    record the peak number of requests in flight
+    """
+    delay = 0.5
+    n_links = 50
+    lock = threading.Lock()
+    in_flight = 0
+    peak = 0
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.in_flight += 1
+            cls.peak = max(cls.peak, cls.in_flight)
+        time.sleep(cls.delay)
+        page = int(self.path.strip('/') or 0)
+        body = ''.join('<a href="/{}">x</a>'.format(page * cls.n_links + k + 1)
+                       for k in range(cls.n_links) if page < cls.n_links)
+        body = '<html><body>{}</body></html>'.format(body).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        with cls.lock:
+            cls.in_flight -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+class LinkSpider(scrapy.Spider):
+    name = 'slow'
+
+    def parse(self, response):
+        for href in response.xpath('//a/@href').getall():
+            yield response.follow(href)
+
+
+# ------------------------------------------------------------------------------
+# Main function
+# ------------------------------------------------------------------------------
+if __name__ == '__main__':
+    args = argparse.ArgumentParser(description='Downloader concurrency stress test')
+    args.add_argument('--concurrency', default=32, type=int,
+                      help='Concurrency of the crawl profile')
+    args.add_argument('--port', default=8767, type=int,
+                      help='Port of the local server')
+    cmd_args = args.parse_args()
+
+    server = ThreadingHTTPServer(('localhost', cmd_args.port), SlowHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    # No start delay, AutoThrottle then aims at the whole concurrency
+    concurrency = cmd_args.concurrency
+    settings = profile_settings(build_profile({}, {'concurrency': concurrency,
+                                                   'autothrottle_target': concurrency,
+                                                   'start_delay': 0.}))
+    settings.update({'LOG_LEVEL': 'WARNING', 'ROBOTSTXT_OBEY': False, 'TELNETCONSOLE_ENABLED': False,
+                     'CLOSESPIDER_PAGECOUNT': 5 * concurrency})
+    LinkSpider.start_urls = ['http://localhost:{}/0'.format(cmd_args.port)]
+    process = CrawlerProcess(settings)
+    process.crawl(LinkSpider)
+    process.start()
+    server.shutdown()
+
+    print(f'Concurrency {concurrency}: peak of {SlowHandler.peak} requests in flight')
+    if concurrency > 16 and SlowHandler.peak <= 16:
+        print('FAILED: the downloader is capped at 16 requests')
+        sys.exit(1)
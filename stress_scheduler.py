@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 18/10/2026 4:00 pm
+
+Stress test of the scheduler queues on a synthetic link graph, comparing the
+peak memory of the in-memory queue with the one of the spilling queue
+"""
+# Standard library imports
+import sys
+import json
+import time
+import resource
+import argparse
+import subprocess
+
+# Third party imports
+import scrapy
+from scrapy.core.scheduler import Scheduler
+from scrapy.utils.test import get_crawler
+
+
+QUEUES = {'memory': 'scrapy.squeues.LifoMemoryQueue',
+          'spill': 'spill_queue.SpillingLifoQueue'}
+
+
+class GraphSpider(scrapy.Spider):
+    name = 'graph'
+
+    def parse(self, response):
+        pass
+
+
+def links(page, n_pages, fanout):
+    """
+    Pages linked from a page of the synthetic site: a few neighbours in the
+    same section and random pages elsewhere, like the related-article boxes
+    """
+    return [(page * 7919 + k * 104729) % n_pages if k % 2 else (page + k + 1) % n_pages
+            for k in range(fanout)]
+
+
+def crawl_graph(queue, n_pages, fanout, n_pops, ram_budget):
+    """
+    Run the scheduler on the synthetic graph with no network: every popped
+    request is answered at once with the links of its page
+    :return: dictionary of the results
+    """
+    crawler = get_crawler(GraphSpider, {'SCHEDULER_MEMORY_QUEUE': QUEUES[queue],
+                                        'SCHEDULER_PRIORITY_QUEUE': 'scrapy.pqueues.ScrapyPriorityQueue',
+                                        'SCHEDULER_RAM_BUDGET': ram_budget,
+                                        'LOG_LEVEL': 'WARNING'})
+    spider = GraphSpider.from_crawler(crawler)
+    crawler.spider = spider
+    scheduler = Scheduler.from_crawler(crawler)
+    scheduler.open(spider)
+
+    tic = time.perf_counter()
+    scheduler.enqueue_request(scrapy.Request('https://example.com/0.html', callback=spider.parse))
+    max_pending = 0
+    n_popped = 0
+    while n_popped < n_pops:
+        request = scheduler.next_request()
+        if request is None:
+            break
+        n_popped += 1
+        page = int(request.url.rsplit('/', 1)[1].split('.')[0])
+        for child in links(page, n_pages, fanout):
+            scheduler.enqueue_request(scrapy.Request('https://example.com/{}.html'.format(child),
+                                                     callback=spider.parse,
+                                                     meta={'source_page': request.url}))
+        max_pending = max(max_pending, len(scheduler))
+    elapsed = time.perf_counter() - tic
+    scheduler.close('finished')
+    return {'queue': queue, 'popped': n_popped, 'max_pending': max_pending,
+            'spilled': crawler.stats.get_value('scheduler/spilled', 0),
+            'seconds': elapsed,
+            'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+
+
+# ------------------------------------------------------------------------------
+# Main function
+# ------------------------------------------------------------------------------
+if __name__ == '__main__':
+    args = argparse.ArgumentParser(description='Scheduler queue stress test')
+    args.add_argument('--queue', default=None, choices=list(QUEUES),
+                      help='Queue to run in this process, both in subprocesses by default')
+    args.add_argument('--n_pages', default=2000000, type=int,
+                      help='Number of pages of the synthetic site')
+    args.add_argument('--fanout', default=20, type=int,
+                      help='Number of links per page')
+    args.add_argument('--n_pops', default=20000, type=int,
+                      help='Number of pages crawled')
+    args.add_argument('--ram_budget', default=10000, type=int,
+                      help='Number of requests kept in memory by the spilling queue')
+    cmd_args = args.parse_args()
+
+    if cmd_args.queue is not None:
+        print(json.dumps(crawl_graph(cmd_args.queue, cmd_args.n_pages, cmd_args.fanout,
+                                     cmd_args.n_pops, cmd_args.ram_budget)))
+        sys.exit(0)
+
+    # Run each queue in its own process so that the peak memory is its own
+    print(f'{"queue":<8s} {"crawled":>8s} {"pending":>9s} {"spilled":>9s} {"seconds":>8s} {"peak MB":>8s}')
+    for queue in QUEUES:
+        output = subprocess.run([sys.executable, __file__, '--queue', queue] +
+                                [arg for name in ['n_pages', 'fanout', 'n_pops', 'ram_budget']
+                                 for arg in ('--' + name, str(getattr(cmd_args, name)))],
+                                capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f'{queue:<8s} {result["popped"]:8d} {result["max_pending"]:9d} {result["spilled"]:9d} '
+              f'{result["seconds"]:8.1f} {result["peak_rss_mb"]:8.0f}')
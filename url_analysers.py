@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 18/10/2026 2:20 pm
+
+Estimate the published date of an article from its url, before fetching it
+"""
+# Standard library imports
+import os
+import re
+import random
+from datetime import datetime, timedelta
+
+# Third party imports
+import numpy as np
+
+# Local application imports
+from jsonl_reader import iter_fields
+
+
+class UrlDateAnalyser:
+    """
+    Map the url of an article to an approximate published date.
+
+    Sites putting the date in the url (e.g. dantri '-20200317101010123.htm')
+    are read directly. Sites with a monotonically increasing article id
+    (e.g. zingnews 'post1185384.html') are calibrated on (id, date) pairs of
+    already crawled articles: the pairs are sorted by id, binned, and the
+    median date of each bin is interpolated. Ids outside the calibrated range
+    are extrapolated with the overall id rate, and the error margin grows with
+    the extrapolated distance.
+
+    The pairs are kept in a uniform reservoir sample of max_observations
+    pairs, so the memory and the cost of a refit stay bounded however long
+    the crawl is.
+    """
+
+    def __init__(self, site_name, id_pattern=None, date_pattern=None,
+                 n_bins=50, refit_every=200, max_observations=20000):
+        self.site_name = site_name
+        self.id_pattern = re.compile(id_pattern) if id_pattern else None
+        self.date_pattern = None
+        self.date_format = None
+        if date_pattern:
+            self.date_pattern = re.compile(date_pattern[0])
+            self.date_format = date_pattern[1]
+        self.n_bins = n_bins
+        self.refit_every = refit_every
+
+        self.ids = np.empty(max_observations, dtype=np.float64)
+        self.times = np.empty(max_observations, dtype=np.float64)
+        self.n_kept = 0
+        self.n_observed = 0
+        self.rng = random.Random(0)
+        self.n_pending = 0
+        self.knot_ids = None
+        self.knot_times = None
+        self.rate = None
+        self.margin = None
+
+    def article_id(self, url):
+        if self.id_pattern is None:
+            return None
+        match = self.id_pattern.search(url)
+        return int(match.group(1)) if match else None
+
+    def add_observation(self, url, art_date):
+        """
+        Add the (id, date) pair of a crawled article, refitting periodically
+        """
+        art_id = self.article_id(url)
+        if art_id is None:
+            return
+        self.keep(art_id, art_date.timestamp())
+        self.n_pending += 1
+        # Refit sooner while uncalibrated, but not on every observation when
+        # the ids seen so far cannot be calibrated (e.g. all equal)
+        if self.n_pending >= (self.refit_every if self.knot_ids is not None else self.n_bins):
+            self.fit()
+
+    def keep(self, art_id, timestamp):
+        # Reservoir sampling: every pair observed so far is kept with the same probability
+        self.n_observed += 1
+        if self.n_kept < len(self.ids):
+            k = self.n_kept
+            self.n_kept += 1
+        else:
+            k = self.rng.randrange(self.n_observed)
+            if k >= len(self.ids):
+                return
+        self.ids[k] = art_id
+        self.times[k] = timestamp
+
+    def load_observations(self, file_name):
+        """
+        Calibrate from a crawled jsonlines file
+        """
+        if self.id_pattern is None or not os.path.exists(file_name):
+            return
+        for url, art_date in iter_fields(file_name, ('url', 'published_datetime')):
+            art_id = self.article_id(url)
+            if art_id is not None:
+                self.keep(art_id, datetime.fromisoformat(art_date).timestamp())
+        self.fit()
+
+    def fit(self):
+        self.n_pending = 0
+        if self.n_kept < 2 * self.n_bins:
+            return
+        order = np.argsort(self.ids[:self.n_kept], kind='stable')
+        ids, times = self.ids[order], self.times[order]
+
+        # Take the median id and date of each bin, forced to be monotonic
+        bins = np.array_split(np.arange(len(ids)), self.n_bins)
+        knot_ids = np.array([np.median(ids[b]) for b in bins])
+        knot_times = np.maximum.accumulate([np.median(times[b]) for b in bins])
+        keep = np.concatenate([[True], np.diff(knot_ids) > 0])
+        self.knot_ids, self.knot_times = knot_ids[keep], knot_times[keep]
+        if len(self.knot_ids) < 2:
+            self.knot_ids = None
+            return
+
+        # Set the overall rate (seconds per id) and the typical error
+        self.rate = (self.knot_times[-1] - self.knot_times[0]) / \
+                    (self.knot_ids[-1] - self.knot_ids[0])
+        residuals = np.abs(np.interp(ids, self.knot_ids, self.knot_times) - times)
+        self.margin = float(np.percentile(residuals, 99))
+
+    def estimate(self, url):
+        """
+        Estimate the published date of the article of the url
+        :return: (estimated date, error margin in seconds),
+                 or (None, None) if the url cannot be analysed
+        """
+        if self.date_pattern is not None:
+            match = self.date_pattern.search(url)
+            if match:
+                try:
+                    return datetime.strptime(match.group(1), self.date_format), 86400.
+                except ValueError:
+                    pass
+            return None, None
+
+        art_id = self.article_id(url)
+        if art_id is None or self.knot_ids is None:
+            return None, None
+        if art_id < self.knot_ids[0]:
+            distance = (self.knot_ids[0] - art_id) * self.rate
+            timestamp = self.knot_times[0] - distance
+        elif art_id > self.knot_ids[-1]:
+            distance = (art_id - self.knot_ids[-1]) * self.rate
+            timestamp = self.knot_times[-1] + distance
+        else:
+            distance = 0.
+            timestamp = np.interp(art_id, self.knot_ids, self.knot_times)
+        return datetime.fromtimestamp(timestamp), self.margin + 0.2 * distance
+
+    def in_window(self, url, start_date, end_date, min_margin=timedelta(days=3)):
+        """
+        Check if the article of the url may be published in [start_date, end_date)
+        :return: False if it is confidently outside the window, True if it is
+                 estimated inside it, None if it is unknown or borderline
+        """
+        art_date, margin = self.estimate(url)
+        if art_date is None:
+            return None
+        margin = max(timedelta(seconds=margin), min_margin)
+        if art_date + margin < start_date or \
+                (end_date is not None and art_date - margin >= end_date):
+            return False
+        if start_date <= art_date and (end_date is None or art_date < end_date):
+            return True
+        return None
+
+
+def build_url_analyser(site_name, spec, data_file=None):
+    """
+    Create the url analyser of a site from its spec, see SITE_SPECS
+    :param data_file: crawled jsonlines file used for the calibration
+    :return: a UrlDateAnalyser, or None if the site has no usable urls
+    """
+    if 'url_id' not in spec and 'url_date' not in spec:
+        return None
+    analyser = UrlDateAnalyser(site_name, id_pattern=spec.get('url_id'),
+                               date_pattern=spec.get('url_date'))
+    if data_file is not None:
+        analyser.load_observations(data_file)
+    return analyser
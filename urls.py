@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 18/10/2026 3:44 pm
+
+Canonical form of the article urls, and filtering of the extracted links
+"""
+# Standard library imports
+import re
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+
+TRACKING_PARAMS = re.compile(r'^(?:utm_\w+|fbclid|gclid|dclid|zarsrc|zacc|_ga|mc_cid|mc_eid|'
+                             r'igshid|itm_\w+)$', re.IGNORECASE)
+# Referrer parameters, not part of the identity of a page but kept when
+# fetching it, in case the site reads them
+REFERRER_PARAMS = re.compile(r'^(?:src|ref|from|source)$', re.IGNORECASE)
+MOBILE_HOST = re.compile(r'^(?:m|amp|mobile)\.')
+AMP_PATH = re.compile(r'/amp(?=/|$)|\.amp(?=\.\w+$|$)')
+
+# Shapes of the links to the tag, search, author, comment and login pages
+NON_ARTICLE_PATH = re.compile(r'/(?:tags?|tu-khoa|tim-kiem|search|tac-gia|author|binh-luan|'
+                              r'comments?|dang-nhap|login|rss)(?=[/.?]|$)', re.IGNORECASE)
+NON_ARTICLE_QUERY = re.compile(r'[?&](?:q|s|query|keywords?|comment_?page|cpage|replytocom)=',
+                               re.IGNORECASE)
+
+
+def canonicalize_url(url):
+    """
+    Canonical form of an article url: https scheme, lowercase host without
+    'www.' or the mobile prefix, no default port, the desktop path instead of
+    the AMP one, no fragment, no tracking or referrer parameters and the
+    remaining query parameters sorted,
+    e.g. 'http://m.vnexpress.net/amp/a-1.html?utm_source=fb#box' -> 'https://vnexpress.net/a-1.html'
+    """
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    host = MOBILE_HOST.sub('', host)
+    if parts.port and parts.port not in (80, 443):
+        host = '{}:{}'.format(host, parts.port)
+    path = AMP_PATH.sub('', parts.path) or '/'
+    query = ''
+    if parts.query:
+        params = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                  if not TRACKING_PARAMS.match(k) and not REFERRER_PARAMS.match(k)]
+        query = urlencode(sorted(params))
+    return urlunsplit(('https', host, path, query, ''))
+
+
+def clean_link(url):
+    """
+    Url fetched for an extracted link: the desktop page instead of the mobile
+    or AMP one, without the fragment and the tracking parameters, but with
+    the scheme, 'www.', port and parameter order of the link so the site
+    does not redirect it. The rules are those of canonicalize_url, which
+    gives the identity of the page,
+    e.g. 'https://m.vnexpress.net/amp/a-1.html?utm_source=fb&page=2#box'
+    -> 'https://vnexpress.net/a-1.html?page=2'
+    """
+    parts = urlsplit(url.strip())
+    netloc = MOBILE_HOST.sub('', parts.netloc.lower())
+    path = AMP_PATH.sub('', parts.path) or '/'
+    query = ''
+    if parts.query:
+        query = urlencode([(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                           if not TRACKING_PARAMS.match(k)])
+    return urlunsplit((parts.scheme, netloc, path, query, ''))
+
+
+class LinkFilter:
+    """
+    Drop the extracted links to non-article pages (tag, search, author,
+    comment and login pages, plus the 'deny_paths' regexes of the site spec)
+    and clean the other ones with clean_link. The links are deduplicated by
+    their canonical url, so the mobile, AMP and tracking parameter variants
+    of a page are scheduled once
+    """
+
+    def __init__(self, deny_paths=()):
+        self.deny_paths = [re.compile(pattern) for pattern in deny_paths]
+
+    def is_denied(self, url):
+        parts = urlsplit(url)
+        if NON_ARTICLE_PATH.search(parts.path) or NON_ARTICLE_QUERY.search('?' + parts.query):
+            return True
+        return any(pattern.search(url) for pattern in self.deny_paths)
+
+    def filter(self, urls):
+        """
+        :param urls: the urls of the links extracted from a page
+        :return: list of (index of the url, cleaned url) of the kept links,
+                 without duplicates
+        """
+        kept = []
+        cleaned = set()
+        for k, url in enumerate(urls):
+            if self.is_denied(url):
+                continue
+            canonical = canonicalize_url(url)
+            if canonical not in cleaned:
+                cleaned.add(canonical)
+                kept.append((k, clean_link(url)))
+        return kept